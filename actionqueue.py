@@ -0,0 +1,34 @@
+import threading
+
+
+class ActionQueue:
+    """
+    Client-side view of an environment (local or a Pyro proxy) that holds back the
+    actions of the agents it hosts and sends them together with flush(), so a tick
+    of many agents costs one take_actions round trip. Properties pass through.
+    """
+    def __init__(self, env):
+        self._env = env
+        self._lock = threading.Lock()
+        self._pending = []
+
+    def __getattr__(self, name):
+        # add, get_property, get_properties, subscribe... go straight to the environment
+        return getattr(self._env, name)
+
+    def pending(self) -> int:
+        """Number of actions waiting for flush()"""
+        return len(self._pending)
+
+    def take_action(self, agent_id: int, action_name: str, params: dict = {}) -> None:
+        with self._lock:
+            self._pending.append((agent_id, action_name, dict(params)))
+
+    def flush(self) -> list:
+        """Sends the queued actions in order; returns (agent_id, action_name, result) per action"""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return []
+        results = self._env.take_actions(batch)
+        return [(agent_id, action_name, result) for (agent_id, action_name, _), result in zip(batch, results)]
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import Pyro4
+
+
+class ProxyPool:
+    """
+    Fixed set of worker threads, each with its own Pyro proxy to `uri`. At most
+    `size` calls are in flight at once, and a proxy is never shared between threads.
+    """
+    def __init__(self, uri: str, size: int = 16, serializer: str = None):
+        self._uri = uri
+        self._serializer = serializer
+        self._local = threading.local()
+        self.size = size
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="proxy")
+
+    def proxy(self):
+        """Proxy of the calling thread"""
+        proxy = getattr(self._local, "proxy", None)
+        if proxy is None:
+            proxy = self._local.proxy = Pyro4.Proxy(self._uri)
+            if self._serializer is not None:
+                proxy._pyroSerializer = self._serializer
+        return proxy
+
+    async def call(self, method: str, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: getattr(self.proxy(), method)(*args))
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+class PooledEnvironment:
+    """Environment seen by agents hosted on a ProxyPool: every call goes through the current thread's proxy"""
+    def __init__(self, pool: ProxyPool):
+        self._pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self._pool.proxy(), name)
+
+
+class AgentRuntime:
+    """
+    Runs the sense/act cycles of many agents as asyncio tasks. Each behave() runs on
+    a pool thread, so the number of OS threads is the pool size, not the number of agents.
+    """
+    def __init__(self, pool: ProxyPool):
+        self._pool = pool
+        self._agents = []
+        self._stopped = asyncio.Event()
+        self.latencies = []         # seconds per behave(), across all agents
+
+    def add(self, agent, period: float = 0.0, steps: int = None) -> None:
+        """
+        :param period: minimum seconds between two cycles of this agent (pacing)
+        :param steps: cycles to run; None runs until stop()
+        """
+        self._agents.append((agent, period, steps))
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    async def _run_agent(self, agent, period, steps):
+        loop = asyncio.get_running_loop()
+        done = 0
+        while not self._stopped.is_set() and (steps is None or done < steps):
+            start = time.perf_counter()
+            await loop.run_in_executor(self._pool.executor, agent.behave)
+            elapsed = time.perf_counter() - start
+            self.latencies.append(elapsed)
+            done += 1
+            if period > elapsed:
+                await asyncio.sleep(period - elapsed)
+        return done
+
+    async def run(self) -> int:
+        """Runs every agent until it finishes its steps or stop() is called; returns the total cycles"""
+        counts = await asyncio.gather(*(self._run_agent(*entry) for entry in self._agents))
+        return sum(counts)
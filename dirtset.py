@@ -0,0 +1,163 @@
+import base64
+from collections.abc import Set
+import Pyro4.util
+
+CHUNK_BITS = 4096
+CHUNK_BYTES = CHUNK_BITS // 8
+_EMPTY_CHUNK = bytes(CHUNK_BYTES)
+
+
+class DirtSet(Set):
+    """
+    Immutable set of dirty locations in [0, length), stored as a bitset split in
+    fixed-size chunks. Every change returns a new version that shares the untouched
+    chunks with the previous one, so handing a version to any number of observers
+    costs nothing and a change costs one chunk copy.
+    """
+    __slots__ = ("_length", "_chunks", "_count", "version")
+
+    def __init__(self, length: int, locations=(), _chunks=None, _count=0, _version=0):
+        self._length = length
+        self.version = _version
+        if _chunks is not None:
+            self._chunks, self._count = _chunks, _count
+            return
+        chunks = [bytearray(CHUNK_BYTES) for _ in range((length + CHUNK_BITS - 1) // CHUNK_BITS)]
+        for x in locations:
+            self._check(x)
+            chunks[x // CHUNK_BITS][(x % CHUNK_BITS) >> 3] |= 1 << (x & 7)
+        self._chunks = tuple(bytes(chunk) if any(chunk) else _EMPTY_CHUNK for chunk in chunks)
+        self._count = sum(bin(int.from_bytes(chunk, "little")).count("1") for chunk in self._chunks)
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    def _check(self, x):
+        if not 0 <= x < self._length:
+            raise ValueError(f"Location {x} out of range [0, {self._length})")
+
+    # --- Set ---
+    def __contains__(self, x) -> bool:
+        if not isinstance(x, int) or not 0 <= x < self._length:
+            return False
+        return bool(self._chunks[x // CHUNK_BITS][(x % CHUNK_BITS) >> 3] & (1 << (x & 7)))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self):
+        for index, chunk in enumerate(self._chunks):
+            if chunk is _EMPTY_CHUNK:
+                continue
+            base = index * CHUNK_BITS
+            bits = int.from_bytes(chunk, "little")
+            while bits:
+                low = bits & -bits
+                yield base + low.bit_length() - 1
+                bits ^= low
+
+    def __eq__(self, other):
+        if isinstance(other, DirtSet) and other._chunks is self._chunks:
+            return True
+        return Set.__eq__(self, other)
+
+    __hash__ = Set._hash
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        # Operators inherited from Set (|, &, -) give plain frozensets
+        return frozenset(iterable)
+
+    def __repr__(self):
+        return f"DirtSet(length={self._length}, version={self.version}, {sorted(self)})"
+
+    # --- New versions ---
+    def _with(self, locations, dirty: bool) -> "DirtSet":
+        chunks = list(self._chunks)
+        copied = {}
+        count = self._count
+        for x in locations:
+            self._check(x)
+            index, byte, mask = x // CHUNK_BITS, (x % CHUNK_BITS) >> 3, 1 << (x & 7)
+            if bool(chunks[index][byte] & mask) == dirty:
+                continue
+            chunk = copied.get(index)
+            if chunk is None:
+                chunk = copied[index] = bytearray(chunks[index])
+                chunks[index] = chunk
+            chunk[byte] ^= mask
+            count += 1 if dirty else -1
+        if not copied:
+            return self
+        for index, chunk in copied.items():
+            chunks[index] = bytes(chunk)
+        return DirtSet(self._length, _chunks=tuple(chunks), _count=count, _version=self.version + 1)
+
+    def union(self, locations) -> "DirtSet":
+        return self._with(locations, True)
+
+    def difference(self, locations) -> "DirtSet":
+        return self._with(locations, False)
+
+    def in_range(self, start: int, stop: int) -> list:
+        """Dirty locations in [start, stop), reading only the bytes that cover that range"""
+        start, stop = max(start, 0), min(stop, self._length)
+        found = []
+        if start >= stop:
+            return found
+        for index in range(start // CHUNK_BITS, (stop - 1) // CHUNK_BITS + 1):
+            chunk = self._chunks[index]
+            if chunk is _EMPTY_CHUNK:
+                continue
+            base = index * CHUNK_BITS
+            low, high = max(start - base, 0), min(stop - base, CHUNK_BITS)
+            first_byte = low >> 3
+            bits = int.from_bytes(chunk[first_byte:(high + 7) >> 3], "little") >> (low - (first_byte << 3))
+            bits &= (1 << (high - low)) - 1
+            while bits:
+                lowest = bits & -bits
+                found.append(base + low + lowest.bit_length() - 1)
+                bits ^= lowest
+        return found
+
+    def changes_from(self, previous: "DirtSet") -> tuple:
+        """(added, removed) locations since `previous`, comparing only the chunks that differ"""
+        added, removed = [], []
+        for index, (old, new) in enumerate(zip(previous._chunks, self._chunks)):
+            if old is new:
+                continue
+            diff = int.from_bytes(old, "little") ^ int.from_bytes(new, "little")
+            now = int.from_bytes(new, "little")
+            while diff:
+                low = diff & -diff
+                (added if now & low else removed).append(index * CHUNK_BITS + low.bit_length() - 1)
+                diff ^= low
+        return added, removed
+
+    # --- Wire ---
+    def to_bytes(self) -> bytes:
+        """The bits of [0, length), ceil(length / 8) bytes: the padding of the last chunk is not sent"""
+        return b"".join(self._chunks)[:(self._length + 7) // 8]
+
+    @classmethod
+    def from_bytes(cls, length: int, data: bytes, version: int = 0) -> "DirtSet":
+        data = data.ljust(len(data) + (-len(data)) % CHUNK_BYTES, b"\0")
+        chunks = tuple(chunk if any(chunk) else _EMPTY_CHUNK
+                       for chunk in (data[i:i + CHUNK_BYTES] for i in range(0, len(data), CHUNK_BYTES)))
+        count = bin(int.from_bytes(data, "little")).count("1")
+        return cls(length, _chunks=chunks, _count=count, _version=version)
+
+
+def _to_dict(dirt: DirtSet) -> dict:
+    return {"__class__": "DirtSet", "length": dirt.length, "version": dirt.version,
+            "bits": base64.b64encode(dirt.to_bytes()).decode("ascii")}
+
+
+def _from_dict(classname: str, d: dict) -> DirtSet:
+    return DirtSet.from_bytes(d["length"], base64.b64decode(d["bits"]), d["version"])
+
+
+# Over Pyro a DirtSet travels as its packed bits: ceil(length / 8) bytes, about length / 6 base64 characters
+Pyro4.util.SerializerBase.register_class_to_dict(DirtSet, _to_dict)
+Pyro4.util.SerializerBase.register_dict_to_class("DirtSet", _from_dict)
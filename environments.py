@@ -1,37 +1,133 @@
+import threading
+from collections import deque
 import agents
 from abc import ABCMeta, abstractmethod
 
 
 class SimulatedEnvironment(metaclass=ABCMeta):
+    """
+    Registries are indexed by agent id, so adding, removing and looking up agents,
+    buffers and subscribers costs the same with one agent or thousands. Writers
+    hold _registry_lock; the per-agent entries are tuples replaced on write, so
+    readers (property lookups, buffer publication) never take a lock.
+    Actions are serialized per agent with agent_lock(); subclasses add their own
+    locks for state shared between agents.
+    """
 
     def __init__(self):
-        self._agents = []
-        self._statebuffers = []
+        self._registry_lock = threading.Lock()
+        self._agents = set()
+        self._statebuffers = {}         # maps agent id with its statebuffers
+        self._subscribers = {}          # maps agent id with the subscribers to notify
+        self._agent_locks = {}          # maps agent id with the lock serializing its actions
 
     def add(self, agent_id: int) -> None:
-        self._agents.append(agent_id)
+        with self._registry_lock:
+            self._agents.add(agent_id)
 
     def remove(self, agent_id: int) -> None:
-        if agent_id in self._agents:
-            self._agents.remove(agent_id)
+        with self._registry_lock:
+            self._agents.discard(agent_id)
+            self._agent_locks.pop(agent_id, None)
 
     def add_statebuffer(self, agent_id: int, statebuffer) -> None:
-        self._agents.append(agent_id)
-        self._statebuffers.append({"agent_id": agent_id, "statebuffer": statebuffer})
+        with self._registry_lock:
+            self._agents.add(agent_id)
+            buffers = self._statebuffers.get(agent_id, ())
+            if not any(buffer is statebuffer for buffer in buffers):
+                self._statebuffers[agent_id] = buffers + (statebuffer,)
 
     def remove_statebuffer(self, agent_id: int, statebuffer) -> None:
-        if agent_id in self._agents:
-            self._agents.remove(agent_id)
-            self._statebuffers.remove(statebuffer)
+        with self._registry_lock:
+            buffers = tuple(buffer for buffer in self._statebuffers.get(agent_id, ()) if buffer is not statebuffer)
+            if buffers:
+                self._statebuffers[agent_id] = buffers
+            else:
+                self._statebuffers.pop(agent_id, None)
+
+    def statebuffers_of(self, agent_id: int) -> tuple:
+        return self._statebuffers.get(agent_id, ())
+
+    def agent_lock(self, agent_id: int) -> threading.RLock:
+        lock = self._agent_locks.get(agent_id)
+        if lock is None:
+            with self._registry_lock:
+                lock = self._agent_locks.setdefault(agent_id, threading.RLock())
+        return lock
+
+    def subscribe(self, agent_id: int, subscriber) -> None:
+        """Register an object with a notify(event) method (local or a Pyro callback proxy)"""
+        with self._registry_lock:
+            self._subscribers[agent_id] = self._subscribers.get(agent_id, ()) + (subscriber,)
+
+    def unsubscribe(self, agent_id: int, subscriber) -> None:
+        with self._registry_lock:
+            subscribers = tuple(s for s in self._subscribers.get(agent_id, ()) if s != subscriber)
+            if subscribers:
+                self._subscribers[agent_id] = subscribers
+            else:
+                self._subscribers.pop(agent_id, None)
+
+    def _notify(self, agent_id: int, event: dict) -> None:
+        for subscriber in self._subscribers.get(agent_id, ()):
+            try:
+                subscriber.notify(event)
+            except Exception:
+                # A remote subscriber that went away must not break the simulation
+                self.unsubscribe(agent_id, subscriber)
 
     @abstractmethod
     def get_property(self, agent_id: int, property_name: str) -> dict:
         pass
 
+    def get_properties(self, agent_id: int, property_names: list) -> dict:
+        """Several properties in a single call (one round trip for remote agents)"""
+        return {name: self.get_property(agent_id, name) for name in property_names}
+
     @abstractmethod
-    def take_action(self, agent_id: int, action_name: str, params: dict = {}) -> None:
+    def take_action(self, agent_id: int, action_name: str, params: dict = {}) -> bool:
+        """:return: True if the action was applied, False if the environment ignored it"""
         pass
 
+    def take_actions(self, batch: list) -> list:
+        """
+        Several actions in a single call (one round trip for many remote agents).
+        :param batch: (agent_id, action_name, params) entries, applied in order
+        :return: one {"ok": bool, "error": str or None} result per entry
+        """
+        results = []
+        for agent_id, action_name, params in batch:
+            if agent_id not in self._agents:
+                results.append({"ok": False, "error": f"Unknown agent: {agent_id}"})
+                continue
+            try:
+                if self.take_action(agent_id, action_name, params or {}):
+                    results.append({"ok": True, "error": None})
+                else:
+                    results.append({"ok": False, "error": f"Action not applied: {action_name}"})
+            except Exception as e:
+                results.append({"ok": False, "error": f"{type(e).__name__}: {e}"})
+        return results
+
+
+class EnvironmentSubscription:
+    """Local subscriber: lets an agent block until the environment notifies it"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._events = deque()
+
+    def notify(self, event: dict) -> None:
+        with self._condition:
+            self._events.append(event)
+            self._condition.notify_all()
+
+    def wait(self, timeout=None):
+        """Next pending event, or None if nothing arrived before the timeout"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._events, timeout)
+            return self._events.popleft() if self._events else None
+
 
 class SimulatedSensor(agents.Sensor):
 
@@ -0,0 +1,36 @@
+import logging
+from abc import ABC, abstractmethod
+
+
+class IEventSink(ABC):
+    @abstractmethod
+    def emit(self, event: dict):
+        pass
+
+
+class NullEventSink(IEventSink):
+    def emit(self, event: dict):
+        pass
+
+
+class BufferedLogEventSink(IEventSink):
+    """Acumula eventos en memoria y los escribe al logger en bloque al llenarse o con flush()"""
+    def __init__(self, logger=None, capacity=1000, level=logging.INFO):
+        self._logger = logger if logger is not None else logging.getLogger("praise.events")
+        self._capacity = capacity
+        self._level = level
+        self._events = []
+
+    @property
+    def events(self):
+        return list(self._events)
+
+    def emit(self, event: dict):
+        self._events.append(event)
+        if len(self._events) >= self._capacity:
+            self.flush()
+
+    def flush(self):
+        if self._events and self._logger.isEnabledFor(self._level):
+            self._logger.log(self._level, "\n".join(str(event) for event in self._events))
+        self._events = []
@@ -0,0 +1,291 @@
+import threading
+import numpy as np
+
+from statebuffer import IStateBuffer
+from environments import SimulatedEnvironment
+
+# Batch action codes for GridVacuumEnvironment.step(): STAY, CLEAN, then one pair of
+# moves per axis (MOVE_BASE + 2 * axis is -1 along that axis, MOVE_BASE + 2 * axis + 1 is +1).
+STAY, CLEAN, MOVE_BASE = 0, 1, 2
+
+# Named directions accepted by take_action("move"): (axis, step). Axis -1 is the last one,
+# so "left"/"right" also work on a 1-D strip and VacuumAgent runs unchanged.
+DIRECTIONS = {"left": (-1, -1), "right": (-1, 1), "up": (0, -1), "down": (0, 1)}
+
+
+class GridVacuumEnvironment(SimulatedEnvironment):
+    """
+    Vacuum World on an N-dimensional grid. Dirt is a boolean array, agent positions
+    are rows of an integer array and an occupancy array maps each cell to the agent
+    standing on it, so a cell holds at most one agent. Individual agents use
+    get_property/take_action; step() moves and cleans for every agent at once.
+    """
+    def __init__(self, shape, dirt_fraction: float = 0.0, view_radius: int = 1, seed=None):
+        super(GridVacuumEnvironment, self).__init__()
+        self._shape = tuple(shape) if not isinstance(shape, int) else (shape,)
+        if not self._shape or min(self._shape) <= 0:
+            raise ValueError(f"Invalid grid shape: {shape}")
+        self._rng = np.random.default_rng(seed)
+        self._view_radius = view_radius
+        self._lock = threading.RLock()                      # the grid is shared by every agent
+
+        self._dirt = np.zeros(self._shape, dtype=bool)
+        self._dirt_count = 0
+        self._occupancy = np.full(self._shape, -1, dtype=np.int32)   # slot of the agent on each cell
+        self._positions = np.zeros((16, len(self._shape)), dtype=np.int64)
+        self._slots = {}                                    # maps agent id with its row in _positions
+        self._ids = []                                      # agent id of each row
+
+        if dirt_fraction > 0:
+            self.random_dirt(int(self._dirt.size * dirt_fraction))
+
+    @property
+    def shape(self) -> tuple:
+        return self._shape
+
+    @property
+    def agent_ids(self) -> list:
+        """Agent ids in the order step() expects their actions"""
+        return list(self._ids)
+
+    @property
+    def dirt_count(self) -> int:
+        return self._dirt_count
+
+    def random_dirt(self, number_dirty_locations: int) -> None:
+        with self._lock:
+            cells = self._rng.choice(self._dirt.size, size=number_dirty_locations, replace=False)
+            self._dirt_count += int(np.count_nonzero(~self._dirt.flat[cells]))
+            self._dirt.flat[cells] = True
+
+    # --- Agents ---
+    def add(self, agent_id: int) -> None:
+        with self._lock:
+            if agent_id in self._slots:
+                return
+            if len(self._ids) >= self._occupancy.size:
+                raise RuntimeError("The grid is full")
+            super(GridVacuumEnvironment, self).add(agent_id)
+            cell = self._random_free_cell()
+
+            slot = len(self._ids)
+            if slot == len(self._positions):
+                self._positions = np.concatenate([self._positions, np.zeros_like(self._positions)])
+            self._positions[slot] = cell
+            self._occupancy[cell] = slot
+            self._slots[agent_id] = slot
+            self._ids.append(agent_id)
+
+    def _random_free_cell(self) -> tuple:
+        for _ in range(64):
+            cell = tuple(int(self._rng.integers(0, n)) for n in self._shape)
+            if self._occupancy[cell] < 0:
+                return cell
+        # Crowded grid: pick among the free cells
+        return np.unravel_index(self._rng.choice(np.flatnonzero(self._occupancy.ravel() < 0)), self._shape)
+
+    def remove(self, agent_id: int) -> None:
+        with self._lock:
+            super(GridVacuumEnvironment, self).remove(agent_id)
+            slot = self._slots.pop(agent_id, None)
+            if slot is None:
+                return
+            self._occupancy[tuple(self._positions[slot])] = -1
+            # The last row fills the gap so rows stay contiguous
+            last = len(self._ids) - 1
+            if slot != last:
+                moved_id = self._ids[last]
+                self._positions[slot] = self._positions[last]
+                self._occupancy[tuple(self._positions[slot])] = slot
+                self._slots[moved_id] = slot
+                self._ids[slot] = moved_id
+            self._ids.pop()
+
+    def add_statebuffer(self, agent_id: int, statebuffer: IStateBuffer) -> None:
+        super(GridVacuumEnvironment, self).add_statebuffer(agent_id, statebuffer)
+        with self._lock:
+            statebuffer.update(self._state_of(agent_id))
+
+    # --- Percepts ---
+    def _location_of(self, agent_id: int):
+        slot = self._slots.get(agent_id)
+        if slot is None:
+            return None
+        location = tuple(int(x) for x in self._positions[slot])
+        return location[0] if len(location) == 1 else location
+
+    def _is_dirty_in_location(self, agent_id: int) -> bool:
+        return bool(self._dirt[tuple(self._positions[self._slots[agent_id]])])
+
+    def _window(self, agent_id: int):
+        """Slices of the cells within view_radius of the agent, clipped to the grid"""
+        position = self._positions[self._slots[agent_id]]
+        return tuple(slice(max(int(x) - self._view_radius, 0), min(int(x) + self._view_radius + 1, n))
+                     for x, n in zip(position, self._shape))
+
+    def _local_dirt(self, agent_id: int) -> list:
+        """Dirty cells within view_radius, as offsets from the agent"""
+        window = self._window(agent_id)
+        offsets = np.argwhere(self._dirt[window]) + [s.start for s in window] - self._positions[self._slots[agent_id]]
+        return [tuple(int(x) for x in offset) for offset in offsets]
+
+    def _local_agents(self, agent_id: int) -> list:
+        """Other agents within view_radius, as offsets from the agent"""
+        window = self._window(agent_id)
+        position = self._positions[self._slots[agent_id]]
+        offsets = np.argwhere(self._occupancy[window] >= 0) + [s.start for s in window] - position
+        return [tuple(int(x) for x in offset) for offset in offsets if offset.any()]
+
+    def _neighbourhood(self, agent_id: int) -> dict:
+        """
+        Location, dirt and other agents within view_radius; the occupancy array is the spatial
+        index. Offsets are tuples, except on a 1-D grid, which answers with the same fields
+        as VacuumEnvironment (length and int offsets) so strip agents run unchanged.
+        """
+        neighbourhood = {"location": self._location_of(agent_id), "shape": self._shape,
+                         "radius": self._view_radius, "dirty": self._is_dirty_in_location(agent_id),
+                         "dirt": self._local_dirt(agent_id), "agents": self._local_agents(agent_id)}
+        if len(self._shape) == 1:
+            neighbourhood["length"] = self._shape[0]
+            neighbourhood["dirt"] = [offset[0] for offset in neighbourhood["dirt"]]
+            neighbourhood["agents"] = [offset[0] for offset in neighbourhood["agents"]]
+        return neighbourhood
+
+    def get_property(self, agent_id: int, property_name: str) -> dict:
+        with self._lock:
+            if agent_id not in self._slots:
+                return {}
+            property_methods = {
+                "location": self._location_of,
+                "dirty": self._is_dirty_in_location,
+                "local_dirt": self._local_dirt,
+                "local_agents": self._local_agents,
+                "neighbourhood": self._neighbourhood,
+            }
+            property_method = property_methods.get(property_name)
+            if property_method is None:
+                print(f"Invalid property: {property_name}")
+                return {"agent": agent_id}
+            return {"agent": agent_id, property_name: property_method(agent_id)}
+
+    # --- Actions ---
+    def take_action(self, agent_id: int, action_name: str, params: dict = {}) -> bool:
+        with self._lock:
+            slot = self._slots.get(agent_id)
+            if slot is None:
+                return False
+            if action_name == "move":
+                direction = params.get("direction")
+                if direction in DIRECTIONS:
+                    axis, step = DIRECTIONS[direction]
+                else:
+                    axis, step = params.get("axis"), params.get("step")
+                if axis is None or step not in (-1, 1) or not -len(self._shape) <= axis < len(self._shape):
+                    print(f"Invalid direction: {direction}")
+                    return False
+                applied = self._move(slot, axis % len(self._shape), step)
+            elif action_name == "clean":
+                applied = self._clean(slot)
+            else:
+                print(f"Invalid action: {action_name}")
+                return False
+            if applied:
+                self._update_statebuffers([agent_id])
+        if applied:
+            self._notify(agent_id, {"type": "state_changed"})
+        return applied
+
+    def _move(self, slot: int, axis: int, step: int) -> bool:
+        """Single-agent move: only the agent's cell and the target cell are touched. False if the target is taken"""
+        cell = tuple(int(x) for x in self._positions[slot])
+        target = list(cell)
+        target[axis] = min(max(target[axis] + step, 0), self._shape[axis] - 1)
+        target = tuple(target)
+        if target == cell:
+            return True
+        if self._occupancy[target] >= 0:
+            return False
+        self._occupancy[cell] = -1
+        self._occupancy[target] = slot
+        self._positions[slot] = target
+        return True
+
+    def _clean(self, slot: int) -> bool:
+        cell = tuple(self._positions[slot])
+        if self._dirt[cell]:
+            self._dirt[cell] = False
+            self._dirt_count -= 1
+        return True
+
+    def step(self, actions) -> np.ndarray:
+        """
+        Applies one action per agent (codes STAY, CLEAN or MOVE_BASE + 2 * axis + (step > 0),
+        in the order of agent_ids) as a single tick, then publishes once. Codes outside that
+        range are rejected: the agent stays. Only the agents that acted are notified.
+        :return: for each agent, True if its code was valid
+        """
+        with self._lock:
+            actions = np.asarray(actions)
+            if actions.shape != (len(self._ids),):
+                raise ValueError(f"Expected {len(self._ids)} actions, got {actions.shape}")
+            valid = (actions >= STAY) & (actions < MOVE_BASE + 2 * len(self._shape))
+            actions = np.where(valid, actions, STAY).astype(np.int8)
+            self._apply(actions)
+            self._update_statebuffers(self._statebuffers.keys())
+            acted = [self._ids[slot] for slot in np.flatnonzero(actions != STAY)]
+        for agent_id in acted:
+            self._notify(agent_id, {"type": "state_changed"})
+        return valid
+
+    def _apply(self, actions):
+        n = len(self._ids)
+        positions = self._positions[:n]
+
+        cleaning = actions == CLEAN
+        if cleaning.any():
+            cells = tuple(positions[cleaning].T)
+            self._dirt_count -= int(np.count_nonzero(self._dirt[cells]))
+            self._dirt[cells] = False
+
+        moving = np.flatnonzero(actions >= MOVE_BASE)
+        if len(moving) == 0:
+            return
+        codes = actions[moving].astype(np.int64) - MOVE_BASE
+        targets = positions[moving].copy()
+        targets[np.arange(len(moving)), codes // 2] += np.where(codes % 2 == 1, 1, -1)
+        upper = np.asarray(self._shape) - 1
+        np.clip(targets, 0, upper, out=targets)
+
+        # A move succeeds if its target was free at the start of the tick and no
+        # agent with a lower row targets the same cell (deterministic, no chains)
+        flat_targets = np.ravel_multi_index(tuple(targets.T), self._shape)
+        free = self._occupancy.flat[flat_targets] < 0
+        candidates = moving[free]
+        _, first = np.unique(flat_targets[free], return_index=True)
+        winners = candidates[first]
+        if len(winners) == 0:
+            return
+        new_positions = targets[free][first]
+
+        self._occupancy[tuple(positions[winners].T)] = -1
+        positions[winners] = new_positions
+        self._occupancy[tuple(new_positions.T)] = winners
+
+    # --- Publication ---
+    def _state_of(self, agent_id: int) -> dict:
+        window = self._window(agent_id)
+        return {
+            "shape": self._shape,
+            "agent_location": self._location_of(agent_id),
+            "view_origin": tuple(s.start for s in window),
+            "view": self._dirt[window].tolist(),
+            "dirt_count": self.dirt_count,
+        }
+
+    def _update_statebuffers(self, agent_ids) -> None:
+        for agent_id in list(agent_ids):
+            buffers = self.statebuffers_of(agent_id)
+            if buffers and agent_id in self._slots:
+                state = self._state_of(agent_id)
+                for statebuffer in buffers:
+                    statebuffer.update(state)
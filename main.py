@@ -1,13 +1,24 @@
-import time
 import sys
+from environments import EnvironmentSubscription
 from statebuffer import StateBuffer
 from trucoenvironment import TrucoEnvironment
 from trucoagents import ManualTrucoAgent, RandomTrucoAgent
 from trucorenderers import TrucoConsoleRenderer
+from trucoeventsinks import TrucoConsoleEventSink
+
+class TurnNotice:
+    """Reenvía los avisos de un agente a una cola compartida, indicando de quién es el aviso"""
+    def __init__(self, agent_id, queue: EnvironmentSubscription):
+        self._agent_id = agent_id
+        self._queue = queue
+
+    def notify(self, event: dict) -> None:
+        self._queue.notify({**event, "agent": self._agent_id})
+
 
 if __name__ == '__main__':
     # Crear Entorno
-    env = TrucoEnvironment()
+    env = TrucoEnvironment(event_sink=TrucoConsoleEventSink())
 
     # Crear Agentes
     human_agent = ManualTrucoAgent(env)
@@ -24,17 +35,26 @@ if __name__ == '__main__':
     renderer.observe(statebuffer=human_buffer)
     renderer.set_environment(env)
 
-    # Bucle principal
+    # El entorno avisa solo al agente que tiene el turno: una cola de avisos para ambos
+    turns = EnvironmentSubscription()
+    env.subscribe(bot_agent.id, TurnNotice(bot_agent.id, turns))
+    env.subscribe(human_agent.id, TurnNotice(human_agent.id, turns))
+
+    # Bucle principal: se bloquea hasta el próximo aviso, sin sondear
     try:
+        bot_agent.behave()
+        renderer.render()
         while not env.game_over:
-            # Bot juega si es su turno
-            bot_agent.behave()
-            
-            # Renderizar y permitir input del humano
+            # El timeout solo existe para poder salir con Ctrl+C (en Windows wait() no se interrumpe)
+            event = turns.wait(timeout=1.0)
+            if event is None:
+                continue
+            if event["agent"] == bot_agent.id:
+                bot_agent.behave()
+
+            # Renderizar y permitir input del humano (juega dentro de render si es su turno)
             renderer.render()
-            
-            time.sleep(0.1)
-        
+
         # Render final
         renderer.render()
         print("\n🎮 Partida finalizada.")
@@ -0,0 +1,19 @@
+import sys
+from functools import partial
+from trucoagents import RandomTrucoAgent
+from trucobatch import run_batch
+
+if __name__ == '__main__':
+    matches = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    # Bots sin pausa entre decisiones
+    bot = partial(RandomTrucoAgent, delay=0)
+    result = run_batch([bot, bot], matches)
+
+    print(f"Partidos:      {result['matches']}")
+    print(f"Manos:         {result['hands']}")
+    print(f"Tiempo:        {result['elapsed']:.2f} s")
+    print(f"Partidos/seg:  {result['games_per_sec']:.1f}")
+    print(f"Manos/seg:     {result['hands_per_sec']:.1f}")
+    for name, rate in result["win_rates"].items():
+        print(f"Victorias {name}: {rate:.1%}")
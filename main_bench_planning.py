@@ -0,0 +1,56 @@
+import random
+import sys
+import time
+from statebuffer import StateBuffer
+from vacuumworld import VacuumEnvironment
+from vacuumagent import VacuumAgent, PlanningVacuumAgent
+
+# Compara el agente aleatorio con el agente planificador en Vacuum World (en proceso,
+# sin Pyro): pasos hasta limpiar todo y decisiones por segundo.
+
+
+def random_agent(env):
+    return VacuumAgent(env)
+
+
+def local_planner(env):
+    # Solo ve su vecindario: recorre las celdas que todavía no vio limpias
+    return PlanningVacuumAgent(env)
+
+
+def buffered_planner(env):
+    # Conoce toda la suciedad a través de su statebuffer
+    agent = PlanningVacuumAgent(env)
+    agent.statebuffer = StateBuffer(agent.id, env, capacity=1)
+    return agent
+
+
+def run(make_agent, length, n_agents, max_steps, seed):
+    random.seed(seed)
+    env = VacuumEnvironment(length, random_dirt=True)
+    agents = [make_agent(env) for _ in range(n_agents)]
+
+    steps = decisions = 0
+    start = time.perf_counter()
+    # Los statebuffers solo se actualizan cuando su agente actúa: se mira la suciedad del entorno
+    while env.dirt_count > 0 and steps < max_steps:
+        for agent in agents:
+            agent.behave()
+        steps += 1
+        decisions += len(agents)
+    elapsed = time.perf_counter() - start
+    return steps, env.dirt_count, decisions / elapsed
+
+
+if __name__ == '__main__':
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n_agents = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    max_steps = int(sys.argv[3]) if len(sys.argv) > 3 else 200_000
+
+    print(f"Largo {length}, {length // 2} celdas sucias, {n_agents} agente(s), máximo {max_steps} pasos")
+    print(f"{'Agente':<26}{'Pasos':>10}{'Sucias':>9}{'Decisiones/seg':>17}")
+    for name, make_agent in (("Aleatorio", random_agent),
+                             ("Planificador (vecindario)", local_planner),
+                             ("Planificador (buffer)", buffered_planner)):
+        steps, left, rate = run(make_agent, length, n_agents, max_steps, seed=0)
+        print(f"{name:<26}{steps:>10}{left:>9}{rate:>17.0f}")
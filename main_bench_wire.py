@@ -0,0 +1,99 @@
+import sys
+import threading
+import time
+import uuid
+import Pyro4
+import Pyro4.naming
+import Pyro4.util
+import wire
+from main_server import VacuumWorldPyroAdapter
+
+# Compara serializadores y formato de mensajes (normal vs. empaquetado de wire.py)
+# para get_property, take_action y get_state, con servidor y name server en este proceso.
+
+
+def start_server(length):
+    Pyro4.config.SERIALIZERS_ACCEPTED.update(wire.SERIALIZERS)
+    ns_uri, ns_daemon, _ = Pyro4.naming.startNS(host="localhost", port=0, enableBroadcast=False)
+    threading.Thread(target=ns_daemon.requestLoop, daemon=True).start()
+    daemon = Pyro4.Daemon(host="localhost")
+    adapter = VacuumWorldPyroAdapter(daemon, Pyro4.Proxy(ns_uri))
+    uri = daemon.register(adapter)
+    threading.Thread(target=daemon.requestLoop, daemon=True).start()
+    adapter.build_env(length=length, dirty_locations=length // 2)
+    return uri, ns_uri
+
+
+def call_size(serializer, method, args, result):
+    """Bytes de la llamada más los de la respuesta, sin compresión"""
+    request, _ = serializer.serializeCall("obj", method, args, {}, compress=False)
+    response, _ = serializer.serializeData(result, compress=False)
+    return len(request) + len(response)
+
+
+def bench(uri, ns_uri, serializer_name, calls):
+    serializer = Pyro4.util.get_serializer(serializer_name)
+    # El agente se registra con el serializador por defecto: msgpack no transporta ids de 128 bits
+    setup = Pyro4.Proxy(uri)
+    agent_id = uuid.uuid1().int
+    setup.add(agent_id)
+    buffer = Pyro4.Proxy(Pyro4.Proxy(ns_uri).lookup(setup.create_statebuffer(agent_id)))
+    buffer._pyroSerializer = serializer_name
+    env = Pyro4.Proxy(uri)
+    env._pyroSerializer = serializer_name
+    packed_id = wire.pack_id(agent_id)
+
+    # Cada método: (llamada, descripción para medir bytes, validación del resultado)
+    plain = {
+        "get_property": (lambda: env.get_property(agent_id, "location"),
+                         lambda r: ("get_property", (agent_id, "location"), r),
+                         lambda r: "location" in r),
+        "take_action": (lambda: env.take_action(agent_id, "move", {"direction": "right"}),
+                        lambda r: ("take_action", (agent_id, "move", {"direction": "right"}), r),
+                        lambda r: "location" in env.get_property(agent_id, "location")),
+        "get_state": (lambda: (env.take_action(agent_id, "clean"), buffer.get_state())[1],
+                      lambda r: ("get_state", (), r),
+                      lambda r: r is not None),
+    }
+    packed = {
+        "get_property": (lambda: env.get_property_packed(packed_id, 0),
+                         lambda r: ("get_property_packed", (packed_id, 0), r),
+                         lambda r: r is not None),
+        "take_action": (lambda: env.take_action_packed(packed_id, 1),
+                        lambda r: ("take_action_packed", (packed_id, 1), r),
+                        lambda r: True),
+        "get_state": (lambda: (env.take_action_packed(packed_id, 2), buffer.get_state_packed())[1],
+                      lambda r: ("get_state_packed", (), r),
+                      lambda r: r is not None),
+    }
+
+    rows = []
+    for format_name, methods in (("normal", plain), ("wire", packed)):
+        for method, (call, describe, valid) in methods.items():
+            try:
+                result = call()
+                if not valid(result):
+                    rows.append((serializer_name, format_name, method, None, "inválido"))
+                    continue
+                start = time.perf_counter()
+                for _ in range(calls):
+                    call()
+                elapsed = time.perf_counter() - start
+                size = call_size(serializer, *describe(result))
+                rows.append((serializer_name, format_name, method, calls / elapsed, size))
+            except Exception as e:
+                rows.append((serializer_name, format_name, method, None, type(e).__name__))
+    return rows
+
+
+if __name__ == '__main__':
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    length = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    uri, ns_uri = start_server(length)
+    print(f"Mundo de {length} celdas, {calls} llamadas por medición")
+    print(f"{'Serializador':<13} {'Formato':<8} {'Método':<13} {'Llamadas/s':>11} {'Bytes/llamada':>14}")
+    for serializer_name in wire.SERIALIZERS:
+        for name, fmt, method, rate, size in bench(uri, ns_uri, serializer_name, calls):
+            rate_text = f"{rate:>11.0f}" if rate is not None else f"{'-':>11}"
+            print(f"{name:<13} {fmt:<8} {method:<13} {rate_text} {size:>14}")
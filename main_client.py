@@ -1,9 +1,30 @@
 import threading
 import Pyro4
+from environments import EnvironmentSubscription
 from vacuumagent import VacuumAgent
 from renderers import NullRenderer
+from statedelta import StreamedStateBuffer
 from vacuumrenderers import ConsoleRenderer, PyGameRenderer
 
+@Pyro4.expose
+class PyroSubscription(EnvironmentSubscription):
+    """Callback object the server calls when this agent's state changes"""
+
+    @Pyro4.oneway
+    def notify(self, event):
+        super().notify(event)
+
+
+@Pyro4.expose
+class PyroStateStream(StreamedStateBuffer):
+    """Callback object the server pushes state changes to"""
+
+    # Not oneway: oneway calls run on separate threads and could overtake each other.
+    # Each subscriber has its own stream thread on the server, so waiting costs nothing
+    def push(self, message):
+        return super().push(message)
+
+
 agent_finished_flag = False
 event_sync_start = threading.Event()
 event_render_ready = threading.Event()
@@ -15,12 +36,16 @@ def agent_thread(agent):
         agent.print_state()
         event_render_ready.wait(timeout=0.1)
         agent.behave()
+        # Wait for the server to apply the action instead of polling for it
+        subscription.wait(timeout=1.0)
         event_render_ready.clear()
     agent_finished_flag = True
 
 def render_thread(renderer):
     while not agent_finished_flag:
-        renderer.render()
+        # Render only when the server pushed a new state
+        if statebuffer.wait(timeout=0.1):
+            renderer.render()
         event_sync_start.set()
         event_render_ready.set()
 
@@ -31,8 +56,17 @@ vacuumenv.build_env(length=5, dirty_locations=3)
 
 agent = VacuumAgent(vacuumenv)
 
+callback_daemon = Pyro4.Daemon(host="localhost")
+subscription = PyroSubscription()
+callback_daemon.register(subscription)
+vacuumenv.subscribe(agent.id, subscription)
+threading.Thread(target=callback_daemon.requestLoop, daemon=True).start()
+
 statebuffer_name = vacuumenv.create_statebuffer(agent.id)
-statebuffer = Pyro4.Proxy(f"PYRONAME:{statebuffer_name}")
+# The server pushes only the changes, at most 30 times per second
+statebuffer = PyroStateStream()
+callback_daemon.register(statebuffer)
+Pyro4.Proxy(f"PYRONAME:{statebuffer_name}").subscribe(statebuffer, max_fps=30)
 
 renderer = ConsoleRenderer()
 renderer.observe(statebuffer)
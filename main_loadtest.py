@@ -0,0 +1,40 @@
+import asyncio
+import statistics
+import sys
+import time
+from clientruntime import AgentRuntime, PooledEnvironment, ProxyPool
+from vacuumagent import VacuumAgent
+
+# Prueba de carga: muchos agentes de Vacuum World en un solo proceso cliente.
+# Requiere el name server y main_server.py en ejecución.
+
+
+async def main(n_agents, steps, pool_size, period, length):
+    pool = ProxyPool("PYRONAME:vacuumworld", size=pool_size)
+    env = PooledEnvironment(pool)
+    env.build_env(length=length, dirty_locations=length // 2)
+
+    runtime = AgentRuntime(pool)
+    for _ in range(n_agents):
+        runtime.add(VacuumAgent(env), period=period, steps=steps)
+
+    start = time.perf_counter()
+    cycles = await runtime.run()
+    elapsed = time.perf_counter() - start
+    pool.close()
+
+    latencies = sorted(runtime.latencies)
+    print(f"Agentes:          {n_agents} (pool de {pool_size} proxies)")
+    print(f"Ciclos:           {cycles}")
+    print(f"Tiempo:           {elapsed:.2f} s")
+    print(f"Ciclos/seg:       {cycles / elapsed:.1f}")
+    print(f"Latencia mediana: {statistics.median(latencies) * 1000:.2f} ms")
+    print(f"Latencia p95:     {latencies[int(len(latencies) * 0.95)] * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    n_agents = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    pool_size = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    period = float(sys.argv[4]) if len(sys.argv) > 4 else 0.0
+    asyncio.run(main(n_agents, steps, pool_size, period, length=100))
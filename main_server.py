@@ -1,5 +1,10 @@
+import threading
+import uuid
+import statedelta
+import wire
 from statebuffer import IStateBuffer, StateBuffer
 from vacuumworld import VacuumEnvironment
+from trucoenvironment import TrucoEnvironment
 import Pyro4
 
 
@@ -11,8 +16,8 @@ class VacuumWorldPyroAdapter:
         self._buffers = {}
 
     @Pyro4.expose
-    def build_env(self, length: int, dirty_locations: int):
-        self._vacuumenv = VacuumEnvironment(length, random_dirt=False)
+    def build_env(self, length: int, dirty_locations: int, view_radius: int = 2):
+        self._vacuumenv = VacuumEnvironment(length, random_dirt=False, view_radius=view_radius)
         self._vacuumenv.random_dirt(number_dirty_locations=dirty_locations)
 
     @Pyro4.expose
@@ -21,14 +26,12 @@ class VacuumWorldPyroAdapter:
             raise RuntimeError("Environment not built yet")
 
         buffer = StateBuffer(agent_id, self._vacuumenv)
-        buffer_adapter = StateBufferPyroAdapter(buffer)
+        buffer_adapter = StateBufferPyroAdapter(buffer, schema="vacuum_state")
 
         uri = self._daemon.register(buffer_adapter)
         name = f"statebuffer.agent_{agent_id}"
         self._ns.register(name, uri)
 
-        self._vacuumenv.add_statebuffer(agent_id, buffer)
-
         self._buffers[agent_id] = buffer
 
         return name
@@ -51,7 +54,19 @@ class VacuumWorldPyroAdapter:
     @Pyro4.expose
     def remove_statebuffer(self, agent_id: int, statebuffer_id: int) -> None:
         if self._vacuumenv is not None:
-            self._vacuumenv.remove(agent_id, statebuffer_id)
+            for buffer in self._vacuumenv.statebuffers_of(agent_id):
+                if buffer.id == statebuffer_id:
+                    self._vacuumenv.remove_statebuffer(agent_id, buffer)
+
+    @Pyro4.expose
+    def subscribe(self, agent_id: int, callback) -> None:
+        if self._vacuumenv is not None:
+            self._vacuumenv.subscribe(agent_id, callback)
+
+    @Pyro4.expose
+    def unsubscribe(self, agent_id: int, callback) -> None:
+        if self._vacuumenv is not None:
+            self._vacuumenv.unsubscribe(agent_id, callback)
 
     @Pyro4.expose
     def get_property(self, agent_id: int, property_name: str) -> dict:
@@ -61,28 +76,222 @@ class VacuumWorldPyroAdapter:
         return response
 
     @Pyro4.expose
-    def take_action(self, agent_id: int, action_name: str, params: dict = {}) -> None:
+    def get_properties(self, agent_id: int, property_names: list) -> dict:
+        response = {}
         if self._vacuumenv is not None:
-            self._vacuumenv.take_action(agent_id, action_name, params)
+            response = self._vacuumenv.get_properties(agent_id, property_names)
+        return response
+
+    @Pyro4.expose
+    def take_action(self, agent_id: int, action_name: str, params: dict = {}) -> bool:
+        if self._vacuumenv is None:
+            return False
+        return self._vacuumenv.take_action(agent_id, action_name, params)
+
+    @Pyro4.expose
+    def take_actions(self, batch: list) -> list:
+        if self._vacuumenv is None:
+            return [{"ok": False, "error": "Environment not built yet"} for _ in batch]
+        return self._vacuumenv.take_actions(batch)
+
+    # Packed variants: see wire.py for the schema
+    @Pyro4.expose
+    def get_property_packed(self, packed_id, property_code: int):
+        if self._vacuumenv is not None:
+            property_name = wire.VACUUM_PROPERTIES[property_code]
+            return self._vacuumenv.get_property(wire.unpack_id(packed_id), property_name).get(property_name)
+
+    @Pyro4.expose
+    def take_action_packed(self, packed_id, action_code: int) -> bool:
+        if self._vacuumenv is None:
+            return False
+        return self._vacuumenv.take_action(wire.unpack_id(packed_id), *wire.unpack_vacuum_action(action_code))
+
+
+class TrucoTable:
+    def __init__(self, table_id: str, seed=None):
+        self.table_id = table_id
+        self.env = TrucoEnvironment(seed=seed)
+        self.lock = threading.Lock()       # guards the seats and buffers; the env locks itself
+        self.players = []
+        self.buffers = []                  # (name server name, StateBufferPyroAdapter)
+
+
+class TrucoPyroAdapter:
+    """Lobby hosting many independent Truco tables; each environment is thread-safe on its own"""
+
+    def __init__(self, daemon, ns):
+        self._daemon = daemon
+        self._ns = ns
+        self._tables = {}
+        self._lobby_lock = threading.Lock()    # only guards the table registry
+
+    def _table(self, table_id: str) -> TrucoTable:
+        with self._lobby_lock:
+            table = self._tables.get(table_id)
+        if table is None:
+            raise KeyError(f"Unknown table: {table_id}")
+        return table
+
+    @Pyro4.expose
+    def create_table(self, seed=None) -> str:
+        table_id = uuid.uuid4().hex[:12]
+        with self._lobby_lock:
+            self._tables[table_id] = TrucoTable(table_id, seed)
+        return table_id
+
+    @Pyro4.expose
+    def join(self, table_id: str, agent_id: int, name: str = None) -> bool:
+        table = self._table(table_id)
+        with table.lock:
+            if len(table.players) >= 2 or agent_id in table.players:
+                return False
+            if name is not None:
+                table.env.set_agent_name(agent_id, name)
+            table.players.append(agent_id)
+            table.env.add(agent_id)
+        return True
+
+    @Pyro4.expose
+    def list_tables(self) -> list:
+        with self._lobby_lock:
+            tables = list(self._tables.values())
+        return [{"table_id": table.table_id, "players": len(table.players),
+                 "game_over": table.env.game_over, "hands_played": table.env.hands_played}
+                for table in tables]
+
+    @Pyro4.expose
+    def close_table(self, table_id: str) -> None:
+        with self._lobby_lock:
+            table = self._tables.pop(table_id, None)
+        if table is not None:
+            with table.lock:
+                buffers, table.buffers = table.buffers, []
+            # The daemon would otherwise keep every adapter, its buffer and the whole
+            # environment alive, and their push streams running
+            for name, adapter in buffers:
+                self._ns.remove(name)
+                self._daemon.unregister(adapter)
+                adapter.close()
+
+    @Pyro4.expose
+    def set_agent_name(self, table_id: str, agent_id: int, name: str) -> None:
+        table = self._table(table_id)
+        table.env.set_agent_name(agent_id, name)
+
+    @Pyro4.expose
+    def create_statebuffer(self, table_id: str, agent_id: int) -> str:
+        table = self._table(table_id)
+        buffer = StateBuffer(agent_id, table.env)
+        adapter = StateBufferPyroAdapter(buffer)
+        uri = self._daemon.register(adapter)
+        name = f"statebuffer.truco.{table_id}.agent_{agent_id}"
+        self._ns.register(name, uri)
+        with table.lock:
+            table.buffers.append((name, adapter))
+        return name
+
+    @Pyro4.expose
+    def subscribe(self, table_id: str, agent_id: int, callback) -> None:
+        table = self._table(table_id)
+        table.env.subscribe(agent_id, callback)
+
+    @Pyro4.expose
+    def unsubscribe(self, table_id: str, agent_id: int, callback) -> None:
+        table = self._table(table_id)
+        table.env.unsubscribe(agent_id, callback)
+
+    @Pyro4.expose
+    def get_property(self, table_id: str, agent_id: int, property_name: str) -> dict:
+        table = self._table(table_id)
+        return table.env.get_property(agent_id, property_name)
+
+    @Pyro4.expose
+    def get_properties(self, table_id: str, agent_id: int, property_names: list) -> dict:
+        table = self._table(table_id)
+        return table.env.get_properties(agent_id, property_names)
+
+    @Pyro4.expose
+    def take_action(self, table_id: str, agent_id: int, action_name: str, params: dict = {}) -> bool:
+        table = self._table(table_id)
+        return table.env.take_action(agent_id, action_name, params)
+
+    @Pyro4.expose
+    def take_actions(self, table_id: str, batch: list) -> list:
+        table = self._table(table_id)
+        return table.env.take_actions(batch)
 
 
 @Pyro4.expose
 class StateBufferPyroAdapter:
-    def __init__(self, buffer: StateBuffer):
+    def __init__(self, buffer: StateBuffer, schema: str = None):
         self._buffer = buffer
+        self._schema = schema              # wire schema for get_state_packed
+        self._streams = []
+        self._streams_lock = threading.Lock()
 
     def update(self, state):
         return self._buffer.update(state)
 
-    def get_state(self):
-        return self._buffer.get_state()
+    def update_fields(self, fields):
+        return self._buffer.update_fields(fields)
+
+    def get_state(self, since=None):
+        return self._buffer.get_state(since)
+
+    def get_state_packed(self):
+        state = self._buffer.get_state()
+        return state if self._schema is None else wire.pack(self._schema, state)
+
+    def get_delta(self, since=0):
+        """Changes since the client's version (keyframe if needed); None if it is up to date"""
+        return statedelta.encode(self._buffer, since)
+
+    def subscribe(self, callback, max_fps=None):
+        """Push mode: callback.push(message) is called once per change, at most max_fps times per second"""
+        stream = statedelta.StateStream(self._buffer, callback, max_fps, on_exit=self._discard_stream)
+        with self._streams_lock:
+            self._streams.append(stream)
+        stream.start()
+
+    def _discard_stream(self, stream):
+        with self._streams_lock:
+            self._streams = [s for s in self._streams if s is not stream]
+
+    def unsubscribe(self, callback):
+        with self._streams_lock:
+            stopped = [stream for stream in self._streams if stream.subscriber == callback]
+            self._streams = [stream for stream in self._streams if stream.subscriber != callback]
+        for stream in stopped:
+            stream.stop()
+
+    def close(self):
+        """Stops every push stream of this buffer"""
+        with self._streams_lock:
+            stopped, self._streams = self._streams, []
+        for stream in stopped:
+            stream.stop()
+
+    def get_version(self):
+        return self._buffer.version
+
+    def history(self, since=0):
+        return self._buffer.history(since)
+
+    def wait_for(self, version, timeout=None):
+        return self._buffer.wait_for(version, timeout)
 
 
 if __name__ == '__main__':
+    # Clients pick their serializer (PYRO_SERIALIZER); the server accepts all of them
+    Pyro4.config.SERIALIZERS_ACCEPTED.update(wire.SERIALIZERS)
     daemon = Pyro4.Daemon(host="localhost")
     ns = Pyro4.locateNS()
     env_adapter = VacuumWorldPyroAdapter(daemon, ns)
     env_uri = daemon.register(env_adapter)
     ns.register("vacuumworld", env_uri)
     print(env_uri)
+    truco_uri = daemon.register(TrucoPyroAdapter(daemon, ns))
+    ns.register("truco", truco_uri)
+    print(truco_uri)
     daemon.requestLoop()
\ No newline at end of file
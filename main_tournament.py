@@ -0,0 +1,18 @@
+import sys
+from functools import partial
+from trucoagents import RandomTrucoAgent
+from trucotournament import Tournament
+
+if __name__ == '__main__':
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    # Participantes: nombre -> fábrica de agentes (sin pausas entre decisiones)
+    entries = {f"Random-{i}": partial(RandomTrucoAgent, delay=0) for i in range(8)}
+
+    tournament = Tournament(entries, games_per_pair=10, seed=42)
+    results = tournament.run_swiss(rounds)
+
+    print(f"Manos jugadas: {tournament.hands}")
+    print(f"{'Agente':<12} {'Elo':>8} {'Puntos':>7} {'Partidos':>9} {'Libres':>7}")
+    for name, rating, points, games, byes in results:
+        print(f"{name:<12} {rating:>8.1f} {points:>7} {games:>9} {byes:>7}")
@@ -0,0 +1,40 @@
+import sys
+import threading
+import Pyro4
+from environments import EnvironmentSubscription
+from trucoagents import RandomTrucoAgent
+from trucoremote import RemoteTrucoTable
+
+
+@Pyro4.expose
+class PyroSubscription(EnvironmentSubscription):
+    """Callback que el servidor llama cuando le toca jugar a este agente"""
+
+    @Pyro4.oneway
+    def notify(self, event):
+        super().notify(event)
+
+
+if __name__ == '__main__':
+    lobby = Pyro4.Proxy("PYRONAME:truco")
+
+    # Sin argumentos crea una mesa nueva; con un id de mesa se une a ella
+    table_id = sys.argv[1] if len(sys.argv) > 1 else lobby.create_table()
+    print(f"Mesa: {table_id}")
+
+    callback_daemon = Pyro4.Daemon(host="localhost")
+    threading.Thread(target=callback_daemon.requestLoop, daemon=True).start()
+
+    table = RemoteTrucoTable(lobby, table_id, name=f"Bot-{table_id[:4]}")
+    agent = RandomTrucoAgent(table, delay=0)
+    turn = PyroSubscription()
+    callback_daemon.register(turn)
+    table.subscribe(agent.id, turn)
+
+    agent.behave()
+    while True:
+        event = turn.wait(timeout=60)
+        if event is None or event["type"] == "game_over":
+            break
+        agent.behave()
+    print("Partido terminado")
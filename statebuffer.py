@@ -1,4 +1,6 @@
+import threading
 import uuid
+from collections import deque
 from abc import ABC, abstractmethod
 from environments import SimulatedEnvironment
 
@@ -6,6 +8,7 @@ from environments import SimulatedEnvironment
 class IStateBuffer(ABC):
     def __init__(self):
         self._uuid = uuid.uuid1()
+        self._lock = threading.RLock()
         self._state = None
         self.changed = False
 
@@ -14,6 +17,23 @@ class IStateBuffer(ABC):
     def id(self):
         return self._uuid.int
 
+    @property
+    def state(self):
+        return self._state
+
+    @state.setter
+    def state(self, state):
+        self._state = state
+
+    def update_fields(self, fields: dict):
+        """Merge a partial update (only the changed keys) into the current state"""
+        with self._lock:
+            self.update({**(self._state or {}), **fields})
+
+    def peek(self):
+        """Latest state without consuming it. Lock-free: states are replaced, never mutated"""
+        return self._state
+
     @abstractmethod
     def update(self, state):
         pass
@@ -22,19 +42,84 @@ class IStateBuffer(ABC):
     def get_state(self):
         pass
 
+# Delivery modes of StateBuffer.get_state()
+LATEST = "latest"   # skip to the newest state (renderers)
+EVERY = "every"     # every retained state, in order (loggers, replays)
+
+
 class StateBuffer(IStateBuffer):
-    def __init__(self, agent_id: int, env: SimulatedEnvironment):
+    """
+    Versioned ring buffer: each update gets the next version number and the last
+    `capacity` states are kept, so a slow reader only loses the states that fell
+    off the ring.
+    """
+    def __init__(self, agent_id: int, env: SimulatedEnvironment, capacity: int = 64, mode: str = LATEST):
         super(StateBuffer, self).__init__()
+        if mode not in (LATEST, EVERY):
+            raise ValueError(f"Invalid delivery mode: {mode}")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
         self._agent_id = agent_id  # Guardar agent_id como atributo
+        self._mode = mode
+        self._history = deque(maxlen=capacity)     # (version, state), contiguous versions
+        self._version = 0
+        self._read_version = 0                     # last version returned by get_state()
+        self._new_state = threading.Condition(self._lock)
         env.add_statebuffer(agent_id, self)
 
+    @property
+    def version(self) -> int:
+        return self._version
+
     def update(self, state):
-        self.state = state
-        self.changed = True
+        with self._lock:
+            self._version += 1
+            self._history.append((self._version, state))
+            self.state = state
+            self.changed = True
+            self._new_state.notify_all()
 
-    def get_state(self):
-        if self.changed:
-            self.changed = False
-            return self.state
-        else:
-            return None
\ No newline at end of file
+    def get_state(self, since: int = None):
+        """
+        Next state for the reader according to the delivery mode, or None if there is nothing new.
+        :param since: version the caller already has. Without it the buffer's own read cursor is
+        used and advanced, as with the single-state buffer.
+        """
+        with self._lock:
+            entry = self._next(self._read_version if since is None else since)
+            if entry is None:
+                return None
+            if since is None:
+                self._read_version = entry[0]
+                self.changed = self._version > self._read_version
+            return entry[1]
+
+    def _next(self, version):
+        if version >= self._version or not self._history:
+            return None
+        if self._mode == LATEST:
+            return self._history[-1]
+        oldest = self._history[0][0]
+        return self._history[max(version + 1 - oldest, 0)]
+
+    def latest(self) -> tuple:
+        """(version, state) of the newest state, without moving the read cursor"""
+        with self._lock:
+            return self._version, self._state
+
+    def state_at(self, version: int):
+        """State published as `version`, or None if it is no longer retained"""
+        with self._lock:
+            if not self._history or not self._history[0][0] <= version <= self._version:
+                return None
+            return self._history[version - self._history[0][0]][1]
+
+    def history(self, since: int = 0) -> list:
+        """Retained (version, state) pairs newer than `since`, oldest first"""
+        with self._lock:
+            return [entry for entry in self._history if entry[0] > since]
+
+    def wait_for(self, version: int, timeout: float = None) -> bool:
+        """Block until the buffer reaches `version`; False on timeout"""
+        with self._lock:
+            return self._new_state.wait_for(lambda: self._version >= version, timeout)
@@ -0,0 +1,196 @@
+import threading
+import time
+from collections.abc import Set
+from dirtset import DirtSet
+
+# Remote statebuffer protocol: the client sends the last version it rebuilt and the
+# server answers with only what changed since then. Set values (such as the Vacuum
+# World dirt) travel as added/removed elements. A keyframe with the full state is
+# sent when the client has nothing yet, when its version is no longer retained by
+# the buffer, and every KEYFRAME_INTERVAL versions so that clients re-synchronize.
+
+KEYFRAME_INTERVAL = 100
+
+
+def diff(old: dict, new: dict) -> dict:
+    """Changes that turn `old` into `new`"""
+    changed, sets, removed = {}, {}, []
+    for key, value in new.items():
+        previous = old.get(key)
+        if key in old and (previous is value or previous == value):
+            continue
+        if key in old and isinstance(previous, DirtSet) and isinstance(value, DirtSet) \
+                and previous.length == value.length:
+            added_cells, removed_cells = value.changes_from(previous)
+            sets[key] = {"added": added_cells, "removed": removed_cells}
+        elif key in old and isinstance(previous, Set) and isinstance(value, Set):
+            sets[key] = {"added": list(value - previous), "removed": list(previous - value)}
+        else:
+            changed[key] = value
+    for key in old:
+        if key not in new:
+            removed.append(key)
+    return {"changed": changed, "sets": sets, "removed": removed}
+
+
+def patch(state: dict, delta: dict) -> dict:
+    """New state from `state` and a delta produced by diff()"""
+    state = dict(state)
+    state.update(delta["changed"])
+    for key, change in delta["sets"].items():
+        current = state[key]
+        if isinstance(current, DirtSet):
+            state[key] = current.difference(change["removed"]).union(change["added"])
+        else:
+            state[key] = (frozenset(current) - frozenset(change["removed"])) | frozenset(change["added"])
+    for key in delta["removed"]:
+        state.pop(key, None)
+    return state
+
+
+def encode(buffer, since: int, keyframe_interval: int = KEYFRAME_INTERVAL):
+    """
+    Message for a client that has version `since` of `buffer` (0 if none), or None if up to date.
+    """
+    version, state = buffer.latest()
+    if version <= since:
+        return None
+    base = buffer.state_at(since) if since > 0 else None
+    if base is None or since // keyframe_interval != version // keyframe_interval:
+        return {"version": version, "keyframe": state}
+    return {"version": version, "since": since, "delta": diff(base, state)}
+
+
+def apply_message(state, message: dict) -> dict:
+    """Full state after a message produced by encode()"""
+    if "keyframe" in message:
+        return message["keyframe"]
+    return patch(state, message["delta"])
+
+
+class StateStream(threading.Thread):
+    """
+    Server side of push mode: sends each new version of a buffer to a subscriber's
+    push(message) method, at most `max_fps` times per second. Versions produced
+    while waiting are folded into the next message. `on_exit(stream)` is called when
+    the stream ends, whether stopped or because the subscriber went away.
+    """
+    def __init__(self, buffer, subscriber, max_fps: float = None, on_exit=None):
+        super().__init__(daemon=True)
+        self._buffer = buffer
+        self.subscriber = subscriber
+        self._min_interval = 1.0 / max_fps if max_fps else 0.0
+        self._stopped = threading.Event()
+        self._on_exit = on_exit
+
+    def run(self):
+        try:
+            self._stream()
+        finally:
+            if self._on_exit is not None:
+                self._on_exit(self)
+
+    def _stream(self):
+        version = 0
+        while not self._stopped.is_set():
+            if not self._buffer.wait_for(version + 1, timeout=0.5):
+                continue
+            sent_at = time.monotonic()
+            message = encode(self._buffer, version)
+            if message is None:
+                continue
+            try:
+                applied = self.subscriber.push(message)
+            except Exception:
+                # A subscriber that went away ends its stream
+                break
+            if applied is False:
+                # The subscriber's version is not the delta's base: resend a keyframe right away
+                version = 0
+                continue
+            version = message["version"]
+            remaining = self._min_interval - (time.monotonic() - sent_at)
+            if remaining > 0:
+                self._stopped.wait(remaining)
+
+    def stop(self):
+        self._stopped.set()
+
+
+class RemoteStateBuffer:
+    """
+    Client side of the protocol: rebuilds the full state from keyframes and deltas.
+    Offers the reading API of StateBuffer, so renderers can observe it directly.
+    """
+    def __init__(self, proxy):
+        self._proxy = proxy
+        self._version = 0
+        self._state = None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def peek(self):
+        return self._state
+
+    def get_state(self):
+        """Latest full state, or None if nothing changed since the last call"""
+        message = self._proxy.get_delta(self._version)
+        if message is None or message["version"] <= self._version:
+            return None
+        self._state = apply_message(self._state, message)
+        self._version = message["version"]
+        return self._state
+
+    def wait_for(self, version: int, timeout: float = None) -> bool:
+        return self._proxy.wait_for(version, timeout)
+
+
+class StreamedStateBuffer:
+    """
+    Client side of push mode: the server calls push() once per change, and readers
+    block in wait() instead of polling. Offers the reading API of StateBuffer.
+    """
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._version = 0
+        self._state = None
+        self.changed = False
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def push(self, message: dict) -> bool:
+        """
+        Applies a message from StateStream. Messages not newer than the current version
+        are dropped; False asks the stream for a keyframe when a delta is based on a
+        version other than ours (a message was lost or arrived out of order).
+        """
+        with self._changed:
+            if message["version"] <= self._version:
+                return True
+            if "delta" in message and message.get("since") != self._version:
+                return False
+            self._state = apply_message(self._state, message)
+            self._version = message["version"]
+            self.changed = True
+            self._changed.notify_all()
+            return True
+
+    def peek(self):
+        return self._state
+
+    def get_state(self):
+        """Latest full state, or None if nothing was pushed since the last call"""
+        with self._changed:
+            if not self.changed:
+                return None
+            self.changed = False
+            return self._state
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until a state that was not read yet arrives; False on timeout"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.changed, timeout)
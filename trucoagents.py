@@ -1,25 +1,33 @@
 import random
 import time
+from concurrent.futures import ProcessPoolExecutor
 from agents import Agent
+from trucoenvironment import CARD_POWER, TrucoState
+from trucoequity import EquityTable, equity
+from trucomcts import ISMCTS, search_worker, to_action
 
 # --- Agente Base ---
 class TrucoAgent(Agent):
-    def __init__(self, env):
+    # Propiedades que se piden al environment en cada percepción
+    PERCEPT_PROPERTIES = ("game_state", "hand", "table")
+
+    def __init__(self, env, seed=None):
         super().__init__()
         self._env = env
+        self._rng = random.Random(seed)  # Generador propio del agente
         env.add(self.id)
     
     def _perceive(self):
-        """Obtiene la percepción completa del agente"""
-        state = self._env.get_property(self.id, "game_state")
-        hand = self._env.get_property(self.id, "hand")
-        table = self._env.get_property(self.id, "table")
-        
-        return {
-            "hand": hand.get("hand", []),
-            "table": table.get("table", []),
-            "game_state": state
+        """Obtiene la percepción completa del agente en una sola llamada al environment"""
+        properties = self._env.get_properties(self.id, list(self.PERCEPT_PROPERTIES))
+        percept = {
+            "hand": properties["hand"].get("hand", []),
+            "table": properties["table"].get("table", []),
+            "game_state": properties["game_state"]
         }
+        if "info_state" in properties:
+            percept["info_state"] = properties["info_state"].get("info_state")
+        return percept
     
     def _act(self, action):
         """Ejecuta una acción en el environment"""
@@ -39,8 +47,13 @@ class TrucoAgent(Agent):
 
 # --- Agente Aleatorio (Bot) ---
 class RandomTrucoAgent(TrucoAgent):
+    def __init__(self, env, delay=0.5, seed=None):
+        super().__init__(env, seed)
+        self._delay = delay  # Pausa por decisión (0 para simulaciones en lote)
+
     def function(self, percept):
-        time.sleep(0.5)
+        if self._delay:
+            time.sleep(self._delay)
         state = percept["game_state"]
         legal_actions = state.get("legal_actions", [])
         hand = percept["hand"]
@@ -61,7 +74,7 @@ class RandomTrucoAgent(TrucoAgent):
             return None
         
         # Elegir aleatoriamente
-        chosen = random.choice(expanded_actions)
+        chosen = self._rng.choice(expanded_actions)
         action_name = chosen[0]
         action_param = chosen[1]
         
@@ -70,6 +83,120 @@ class RandomTrucoAgent(TrucoAgent):
         else:
             return {"name": action_name}
 
+# --- Agente ISMCTS (Bot con búsqueda) ---
+class ISMCTSTrucoAgent(TrucoAgent):
+    """
+    Decide con Information Set MCTS: determiniza la mano del rival entre las cartas
+    no vistas y simula hasta el final de la mano. El árbol se reutiliza en las
+    decisiones de una misma mano. Con workers > 0 además corre búsquedas
+    independientes en un pool de procesos y suma sus estadísticas a la raíz.
+    """
+    PERCEPT_PROPERTIES = TrucoAgent.PERCEPT_PROPERTIES + ("info_state",)
+
+    def __init__(self, env, time_budget=0.1, max_iterations=None, workers=0, exploration=0.7, seed=None):
+        super().__init__(env, seed)
+        self._time_budget = time_budget
+        self._max_iterations = max_iterations
+        self._workers = workers
+        self._exploration = exploration
+        self._pool = None
+        self._tree = None
+        self._tree_hand = None
+
+    def function(self, percept):
+        legal_actions = percept["game_state"].get("legal_actions", [])
+        info = percept.get("info_state")
+        if not legal_actions or info is None:
+            return None
+
+        seat = info["seat"]
+        state = TrucoState(*info["state"])
+        if self._tree is None or self._tree_hand != state.hands_played:
+            self._tree = ISMCTS(seat, self._exploration, self._rng)
+            self._tree_hand = state.hands_played
+
+        futures = []
+        if self._workers:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self._workers)
+            futures = [self._pool.submit(search_worker, state, seat, self._time_budget, self._max_iterations,
+                                         self._exploration, self._rng.getrandbits(64))
+                       for _ in range(self._workers)]
+        self._tree.search(state, self._time_budget, self._max_iterations)
+        for future in futures:
+            self._tree.merge_root(state, future.result())
+
+        stats = {key: visits for key, (visits, _) in self._tree.root_stats(state).items() if key[0] in legal_actions}
+        if not stats:
+            return None
+        name, index = to_action(state, max(stats, key=stats.get))
+        if name == "play_card":
+            return {"name": "play_card", "params": {"index": index}}
+        return {"name": name}
+
+    def close(self):
+        """Libera el pool de procesos de búsqueda"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+# --- Agente por Equidad (Bot por tabla) ---
+class EquityTrucoAgent(TrucoAgent):
+    """
+    Canta y responde según la probabilidad de ganar la mano (trucoequity): tabla
+    precalculada para la mano completa y cálculo exacto memoizado en el resto.
+    """
+    PERCEPT_PROPERTIES = TrucoAgent.PERCEPT_PROPERTIES + ("info_state",)
+    _table = None
+
+    def __init__(self, env, truco_threshold=0.75, quiero_threshold=0.5, seed=None):
+        super().__init__(env, seed)
+        self._truco_threshold = truco_threshold
+        self._quiero_threshold = quiero_threshold
+        if EquityTrucoAgent._table is None:
+            EquityTrucoAgent._table = EquityTable()
+
+    def _equity(self, state, seat):
+        hand = state.hands[seat]
+        is_mano = state.mano == seat
+        if len(hand) == 3 and not state.table:
+            return self._table.hand_strength(hand, is_mano)
+        my_table = next((card for s, card in state.table if s == seat), None)
+        their_table = next((card for s, card in state.table if s != seat), None)
+        seen = [card for card in state.played if card not in (my_table, their_table)]
+        history = [None if winner is None else winner == seat for winner in state.round_history]
+        return equity(hand, is_mano, history, their_table, seen, my_table)
+
+    def function(self, percept):
+        legal_actions = percept["game_state"].get("legal_actions", [])
+        info = percept.get("info_state")
+        if not legal_actions or info is None:
+            return None
+
+        seat = info["seat"]
+        state = TrucoState(*info["state"])
+        strength = self._equity(state, seat)
+
+        if state.waiting_response:
+            for raise_ in ("retruco", "vale4"):
+                if raise_ in legal_actions and strength >= self._truco_threshold:
+                    return {"name": raise_}
+            return {"name": "quiero" if strength >= self._quiero_threshold else "no_quiero"}
+
+        if "truco" in legal_actions and strength >= self._truco_threshold:
+            return {"name": "truco"}
+
+        # Contesta con la carta más baja que gana; si no gana ninguna, o si abre, la más baja
+        hand = state.hands[seat]
+        their_table = next((card for s, card in state.table if s != seat), None)
+        order = sorted(range(len(hand)), key=lambda i: CARD_POWER[hand[i]])
+        index = order[0]
+        if their_table is not None:
+            index = next((i for i in order if CARD_POWER[hand[i]] > CARD_POWER[their_table]), order[0])
+        return {"name": "play_card", "params": {"index": index}}
+
+
 # --- Agente Manual (Usuario) ---
 class ManualTrucoAgent(TrucoAgent):
     def function(self, percept):
@@ -0,0 +1,53 @@
+import random
+import time
+from collections import Counter
+from trucoenvironment import TrucoEnvironment
+
+
+def play_match(agent_factories, seed=None):
+    """
+    Juega un partido completo sin pausas, sin renderer y sin salida por consola.
+    :param agent_factories: callables (env, seed=...) -> TrucoAgent (por ejemplo la clase del agente)
+    :param seed: semilla del partido; con la misma semilla el partido se repite exactamente
+    :return: (environment, lista de agentes)
+    """
+    seeds = random.Random(seed)
+    env = TrucoEnvironment(seed=seeds.getrandbits(64))  # Sin event sink: no hay E/S por mano
+    agents = [factory(env, seed=seeds.getrandbits(64)) for factory in agent_factories]
+    while not env.game_over:
+        for agent in agents:
+            agent.behave()
+    return env, agents
+
+
+def run_batch(agent_factories, matches: int) -> dict:
+    """
+    Juega `matches` partidos seguidos y devuelve métricas de rendimiento
+    (partidos/seg, manos/seg) y el porcentaje de victorias por clase de agente.
+    Los agentes deben decidir solos (ManualTrucoAgent nunca termina un partido).
+    """
+    wins = Counter()
+    appearances = Counter()
+    hands = 0
+
+    start = time.perf_counter()
+    for _ in range(matches):
+        env, agents = play_match(agent_factories)
+        hands += env.hands_played
+        winner_id = env.match_winner_id
+        for agent in agents:
+            class_name = type(agent).__name__
+            appearances[class_name] += 1
+            if agent.id == winner_id:
+                wins[class_name] += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "matches": matches,
+        "hands": hands,
+        "elapsed": elapsed,
+        "games_per_sec": matches / elapsed if elapsed > 0 else 0.0,
+        "hands_per_sec": hands / elapsed if elapsed > 0 else 0.0,
+        "wins": dict(wins),
+        "win_rates": {name: wins[name] / count for name, count in appearances.items()},
+    }
@@ -1,5 +1,8 @@
 import random
+import threading
+from collections import namedtuple
 from environments import SimulatedEnvironment
+from eventsinks import IEventSink, NullEventSink
 
 # Valores de las cartas
 CARD_VALUES = {
@@ -16,21 +19,129 @@ CARD_VALUES = {
     ('Espada', 4): 1, ('Basto', 4): 1, ('Oro', 4): 1, ('Copa', 4): 1,
 }
 
+# Grupos de campos del estado publicado, para la publicación incremental
+STATE_FIELD_GROUPS = frozenset(("scores", "table", "mano", "turn", "history", "game_over", "bet", "opponent"))
+
+BET_STATUS = {1: "Nada", 2: "Truco", 3: "Retruco", 4: "Vale Cuatro"}
+
+_MISSING = object()
+
+# Codificación entera de las 40 cartas: índice = palo * 10 + posición del número
+SUITS = ('Espada', 'Basto', 'Oro', 'Copa')
+NUMBERS = (1, 2, 3, 4, 5, 6, 7, 10, 11, 12)
+DECK = tuple(range(len(SUITS) * len(NUMBERS)))
+
+# Tablas precalculadas por índice de carta: el motor trabaja solo con enteros
+CARD_SUIT = tuple(SUITS[c // len(NUMBERS)] for c in DECK)
+CARD_NUMBER = tuple(NUMBERS[c % len(NUMBERS)] for c in DECK)
+CARD_POWER = tuple(CARD_VALUES[(CARD_SUIT[c], CARD_NUMBER[c])] for c in DECK)
+CARD_NAMES = tuple(f"{CARD_NUMBER[c]} de {CARD_SUIT[c]}" for c in DECK)
+
+
+def card_index(suit, number):
+    return SUITS.index(suit) * len(NUMBERS) + NUMBERS.index(number)
+
+
+# --- Reglas compartidas por el entorno y por step() ---
+BET_LEVELS = {"truco": 2, "retruco": 3, "vale4": 4}
+
+
+def legal_action_names(bet_level, waiting_response):
+    """Acciones legales de quien tiene el turno"""
+    if waiting_response:
+        legal_actions = ["quiero", "no_quiero"]
+        if bet_level == 2: legal_actions.append("retruco")
+        if bet_level == 3: legal_actions.append("vale4")
+    else:
+        legal_actions = ["play_card"]
+        if bet_level == 1:
+            legal_actions.append("truco")
+    legal_actions.append("irse_al_mazo")
+    return legal_actions
+
+
+def mazo_points(bet_level, waiting_response):
+    """Puntos para el rival de quien se va al mazo"""
+    points = bet_level if not waiting_response else (bet_level - 1 if bet_level > 2 else 1)
+    if waiting_response and bet_level == 2: points = 1
+    return points
+
+
+def no_quiero_points(bet_level):
+    """Puntos para quien cantó cuando el rival no quiere"""
+    points = 1
+    if bet_level == 3: points = 2
+    elif bet_level == 4: points = 3
+    return points
+
+
+def hand_winner(history, mano):
+    """Ganador de la mano según los ganadores de cada ronda (None = parda), o None si sigue"""
+    if len(history) < 2: return None
+
+    r1 = history[0]
+    r2 = history[1] if len(history) > 1 else None
+
+    if r1 is not None and r1 == r2: return r1
+    if r1 is not None and r2 is None: return r1
+    if r1 is None and r2 is not None: return r2
+
+    if len(history) == 3:
+        r3 = history[2]
+        if r3 is not None: return r3
+        if r3 is None:
+            if r1 is None and r2 is None: return mano
+            if r1 is not None: return r1
+
+    return None
+
+
+# Estado de juego compacto e inmutable. Los jugadores se identifican por asiento
+# (0 o 1, el orden de `players`); las cartas son índices enteros.
+TrucoState = namedtuple("TrucoState", [
+    "players",           # ids de los agentes por asiento
+    "hands",             # tupla por asiento con las cartas en mano
+    "table",             # ((asiento, carta), ...) de la ronda actual
+    "played",            # cartas jugadas en la mano, en orden (información pública)
+    "scores",            # puntos por asiento
+    "dealer",            # asiento que repartió
+    "mano",              # asiento que es mano
+    "round_history",     # ganador de cada ronda jugada (None = parda)
+    "round_number",
+    "bet_level",
+    "bet_caller",
+    "waiting_response",
+    "current_turn",      # asiento con el turno (None = mano terminada sin repartir)
+    "game_over",
+    "hands_played",
+])
+
+
 class Card:
+    __slots__ = ("suit", "number", "power")
+
     def __init__(self, suit, number):
         self.suit = suit
         self.number = number
         self.power = CARD_VALUES.get((suit, number), 0)
 
+    @classmethod
+    def from_index(cls, index):
+        return cls(CARD_SUIT[index], CARD_NUMBER[index])
+
     def __str__(self):
         return f"{self.number} de {self.suit}"
 
 class TrucoEnvironment(SimulatedEnvironment):
-    def __init__(self):
+    def __init__(self, seed=None, event_sink: IEventSink = None):
         super(TrucoEnvironment, self).__init__()
-        self._deck = []
+        self._rng = random.Random(seed)  # Generador propio: partidos reproducibles e independientes
+        self._game_lock = threading.RLock()  # Todo el estado de la partida es compartido: un lock por entorno
+        self._event_sink = event_sink if event_sink is not None else NullEventSink()
+        self._deck = list(DECK)  # Se reutiliza y se mezcla en cada mano
         self._hands = {} 
         self._table_cards = [] 
+        self._played_cards = []  # Cartas jugadas en la mano actual
         self._scores = {}
         self._turn_order = []
         
@@ -39,6 +150,7 @@ class TrucoEnvironment(SimulatedEnvironment):
         self._round_history = []      
         self._game_over = False
         self._current_round_number = 1
+        self._hands_played = 0
         
         self._bet_level = 1 
         self._bet_caller_id = None
@@ -49,36 +161,87 @@ class TrucoEnvironment(SimulatedEnvironment):
         self._last_actions = {}  # Trackear última acción de cada jugador
         self._last_log = "Inicio del juego"
 
+        # Publicación incremental: grupos de campos modificados desde la última publicación
+        self._dirty = set(STATE_FIELD_GROUPS)
+        self._dirty_hands = set()
+        self._published = {}  # id(statebuffer) -> último estado enviado a ese buffer
+
     @property
     def game_over(self):
         return self._game_over
 
+    @property
+    def hands_played(self):
+        return self._hands_played
+
+    @property
+    def match_winner_id(self):
+        """Id del agente que llegó a 15 puntos, o None si el partido sigue"""
+        if not self._game_over:
+            return None
+        for aid, score in self._scores.items():
+            if score >= 15:
+                return aid
+        return None
+
     def set_agent_name(self, agent_id: int, name: str):
-        self._agent_names[agent_id] = name
+        with self._game_lock:
+            self._agent_names[agent_id] = name
+            # Los nombres aparecen en casi todos los campos publicados
+            self._mark_dirty("scores", "table", "mano", "turn", "history", "game_over", "opponent")
+
+    def _mark_dirty(self, *groups):
+        self._dirty.update(groups)
+
+    def set_event_sink(self, event_sink: IEventSink):
+        self._event_sink = event_sink
+
+    def _emit_hand_won(self, reason, winner_id, loser_id, points):
+        self._event_sink.emit({
+            "type": "hand_won",
+            "reason": reason,
+            "winner_id": winner_id,
+            "winner_name": self._get_name(winner_id),
+            "loser_id": loser_id,
+            "loser_name": self._get_name(loser_id),
+            "points": points,
+            "hand_number": self._hands_played,
+        })
 
     def _get_name(self, agent_id):
         return self._agent_names.get(agent_id, f"J-{str(agent_id)[:4]}")
 
-    def _create_deck(self):
-        suits = ['Espada', 'Basto', 'Oro', 'Copa']
-        numbers = [1, 2, 3, 4, 5, 6, 7, 10, 11, 12]
-        deck = [Card(s, n) for s in suits for n in numbers]
-        random.shuffle(deck)
-        return deck
+    def _shuffle_deck(self):
+        self._deck[:] = DECK
+        self._rng.shuffle(self._deck)
 
     def add(self, agent_id: int) -> None:
-        super().add(agent_id)
-        self._hands[agent_id] = []
-        self._scores[agent_id] = 0
-        self._turn_order.append(agent_id)
-        
-        if len(self._turn_order) == 2:
-            self._dealer_index = random.randrange(len(self._turn_order))
-            self._start_new_hand()
+        with self._game_lock:
+            super().add(agent_id)
+            self._hands[agent_id] = []
+            self._scores[agent_id] = 0
+            self._turn_order.append(agent_id)
+            self._mark_dirty("scores", "opponent")
+
+            if len(self._turn_order) == 2:
+                self._dealer_index = self._rng.randrange(len(self._turn_order))
+                self._start_new_hand()
+                self._notify_turn()
+
+    def _notify_turn(self):
+        """Despierta solo al agente que tiene que jugar (o a todos si terminó el partido)"""
+        if not self._subscribers:
+            return
+        if self._game_over:
+            for agent_id in self._turn_order:
+                self._notify(agent_id, {"type": "game_over"})
+        elif self._current_turn_id is not None:
+            self._notify(self._current_turn_id, {"type": "turn", "waiting_response": self._waiting_response})
 
     def _start_new_hand(self):
         if any(s >= 15 for s in self._scores.values()):
             self._game_over = True
+            self._mark_dirty("game_over", "turn")
             self._update_all_buffers()
             return
 
@@ -88,10 +251,12 @@ class TrucoEnvironment(SimulatedEnvironment):
         mano_index = (self._dealer_index + 1) % len(self._turn_order)
         self._mano_player_id = self._turn_order[mano_index]
 
-        self._deck = self._create_deck()
-        self._table_cards = []
+        self._shuffle_deck()
+        self._table_cards.clear()
+        self._played_cards.clear()
         self._round_history = [] 
         self._current_round_number = 1 
+        self._hands_played += 1
         
         self._bet_level = 1
         self._waiting_response = False
@@ -100,58 +265,138 @@ class TrucoEnvironment(SimulatedEnvironment):
         self._last_log = "--- Nueva Mano ---"
 
         for agent_id in self._turn_order:
-            self._hands[agent_id] = [self._deck.pop() for _ in range(3)]
+            hand = self._hands[agent_id]
+            hand.clear()
+            hand.extend((self._deck.pop(), self._deck.pop(), self._deck.pop()))
         
         self._current_turn_id = self._mano_player_id
+        self._dirty_hands.update(self._turn_order)
+        self._mark_dirty("table", "mano", "turn", "history", "bet")
         self._update_all_buffers()
 
+    def snapshot(self) -> TrucoState:
+        """Estado de juego actual como valor inmutable (sin buffers, nombres ni logs)"""
+        with self._game_lock:
+            players = tuple(self._turn_order)
+            seat = {aid: i for i, aid in enumerate(players)}
+            seat[None] = None
+            return TrucoState(
+                players=players,
+                hands=tuple(tuple(self._hands[aid]) for aid in players),
+                table=tuple((seat[aid], card) for aid, card in self._table_cards),
+                played=tuple(self._played_cards),
+                scores=tuple(self._scores[aid] for aid in players),
+                dealer=self._dealer_index,
+                mano=seat[self._mano_player_id],
+                round_history=tuple(seat[aid] for aid in self._round_history),
+                round_number=self._current_round_number,
+                bet_level=self._bet_level,
+                bet_caller=seat[self._bet_caller_id],
+                waiting_response=self._waiting_response,
+                current_turn=seat[self._current_turn_id],
+                game_over=self._game_over,
+                hands_played=self._hands_played,
+            )
+
+    def restore(self, state: TrucoState) -> None:
+        """Vuelve al estado `state` (obtenido con snapshot() o step()) y lo publica"""
+        with self._game_lock:
+            players = state.players
+
+            def agent(seat):
+                return players[seat] if seat is not None else None
+
+            self._turn_order = list(players)
+            self._hands = {aid: list(hand) for aid, hand in zip(players, state.hands)}
+            self._table_cards = [(players[seat], card) for seat, card in state.table]
+            self._played_cards = list(state.played)
+            self._scores = dict(zip(players, state.scores))
+            self._dealer_index = state.dealer
+            self._mano_player_id = agent(state.mano)
+            self._round_history = [agent(seat) for seat in state.round_history]
+            self._current_round_number = state.round_number
+            self._bet_level = state.bet_level
+            self._bet_caller_id = agent(state.bet_caller)
+            self._waiting_response = state.waiting_response
+            self._current_turn_id = agent(state.current_turn)
+            self._game_over = state.game_over
+            self._hands_played = state.hands_played
+
+            self._dirty_hands.update(players)
+            self._mark_dirty(*STATE_FIELD_GROUPS)
+            self._update_all_buffers()
+            self._notify_turn()
+
+    def clone(self, seed=None):
+        """Copia independiente del juego, sin statebuffers, nombres, event sink ni logs"""
+        env = TrucoEnvironment(seed=seed)
+        for agent_id in self._turn_order:
+            SimulatedEnvironment.add(env, agent_id)
+        env.restore(self.snapshot())
+        return env
+
+    def get_properties(self, agent_id: int, property_names) -> dict:
+        # Todas las propiedades salen del mismo estado, aunque otro hilo esté jugando
+        with self._game_lock:
+            return super().get_properties(agent_id, property_names)
+
     def get_property(self, agent_id: int, property_name: str) -> dict:
+        with self._game_lock:
+            return self._get_property(agent_id, property_name)
+
+    def _get_property(self, agent_id, property_name):
         if agent_id not in self._agents:
             return {}
         
         response = {"agent": agent_id}
         
-        if property_name == "hand":
-            response["hand"] = [(c.number, c.suit) for c in self._hands[agent_id]]
+        if property_name == "info_state":
+            response["info_state"] = self._info_state(agent_id)
+        elif property_name == "hand":
+            response["hand"] = [(CARD_NUMBER[c], CARD_SUIT[c]) for c in self._hands[agent_id]]
         elif property_name == "table":
-            response["table"] = [{"agent": self._get_name(aid), "card": str(c)} for aid, c in self._table_cards]
+            response["table"] = [{"agent": self._get_name(aid), "card": CARD_NAMES[c]} for aid, c in self._table_cards]
         elif property_name == "is_my_turn":
             response["is_my_turn"] = (agent_id == self._current_turn_id) and not self._game_over
         elif property_name == "game_state":
-            # Calcular acciones legales para este agente
-            legal_actions = []
-            is_my_turn = (agent_id == self._current_turn_id) and not self._game_over
-            
-            if is_my_turn:
-                if self._waiting_response:
-                    legal_actions = ["quiero", "no_quiero"]
-                    if self._bet_level == 2: legal_actions.append("retruco")
-                    if self._bet_level == 3: legal_actions.append("vale4")
-                else:
-                    legal_actions.append("play_card")
-                    if self._bet_level == 1: 
-                        legal_actions.append("truco")
-                
-                legal_actions.append("irse_al_mazo")
-            
-            response["is_my_turn"] = is_my_turn
+            response["is_my_turn"] = (agent_id == self._current_turn_id) and not self._game_over
             response["waiting_response"] = self._waiting_response
             response["current_bet_level"] = self._bet_level
-            response["legal_actions"] = legal_actions
+            response["legal_actions"] = self._legal_actions(agent_id)
             response["opponent_name"] = self._get_name(self._get_opponent_id(agent_id))
             response["last_opponent_action"] = self._last_actions.get(self._get_opponent_id(agent_id))
         
         return response
 
+    def _info_state(self, agent_id):
+        """Snapshot visto por el agente: la mano del rival se oculta (cartas en -1)"""
+        state = self.snapshot()
+        if len(state.players) < 2:
+            return None
+        seat = state.players.index(agent_id)
+        hands = list(state.hands)
+        hands[1 - seat] = (-1,) * len(hands[1 - seat])
+        return {"seat": seat, "state": state._replace(hands=tuple(hands))}
+
     def _get_opponent_id(self, my_id):
         for aid in self._turn_order:
             if aid != my_id: return aid
         return None
 
-    def take_action(self, agent_id: int, action_name: str, params: dict = {}) -> None:
-        if self._game_over or self._current_turn_id != agent_id:
-            return
-
+    def take_action(self, agent_id: int, action_name: str, params: dict = {}) -> bool:
+        with self._game_lock:
+            # Fuera de turno, acción ilegal o carta inexistente: no se aplica
+            if action_name not in self._legal_actions(agent_id):
+                return False
+            if action_name == "play_card":
+                card = params.get("index")
+                if card is None or not 0 <= card < len(self._hands[agent_id]):
+                    return False
+            self._apply_action(agent_id, action_name, params)
+            self._notify_turn()
+            return True
+
+    def _apply_action(self, agent_id, action_name, params):
         agent_name = self._get_name(agent_id)
 
         # Irse al mazo está permitido siempre
@@ -164,6 +409,7 @@ class TrucoEnvironment(SimulatedEnvironment):
             if action_name == "quiero":
                 self._last_log = f"{agent_name} dijo: ¡QUIERO!"
                 self._waiting_response = False
+                self._mark_dirty("bet", "turn")
                 
                 if len(self._table_cards) == 1:
                     played_id = self._table_cards[0][0]
@@ -195,41 +441,29 @@ class TrucoEnvironment(SimulatedEnvironment):
         self._update_all_buffers()
 
     def _handle_bet_raise(self, agent_id, bet_type):
-        if bet_type == "truco": self._bet_level = 2
-        elif bet_type == "retruco": self._bet_level = 3
-        elif bet_type == "vale4": self._bet_level = 4
+        self._bet_level = BET_LEVELS[bet_type]
         
         self._bet_caller_id = agent_id
         self._waiting_response = True
         self._current_turn_id = self._get_opponent_id(agent_id)
+        self._mark_dirty("bet", "turn")
 
     def _handle_irse_al_mazo(self, quitter_id):
         winner_id = self._get_opponent_id(quitter_id)
-        points = self._bet_level if not self._waiting_response else (self._bet_level - 1 if self._bet_level > 2 else 1)
-        if self._waiting_response and self._bet_level == 2: points = 1
+        points = mazo_points(self._bet_level, self._waiting_response)
         
         self._scores[winner_id] += points
-        winner_name = self._get_name(winner_id)
-        quitter_name = self._get_name(quitter_id)
-        print(f"\n{'*'*60}")
-        print(f" {quitter_name} se fue al mazo")
-        print(f" Gana la mano: {winner_name} (+{points} punto{'s' if points > 1 else ''})")
-        print(f"{'*'*60}\n")
+        self._mark_dirty("scores")
+        self._emit_hand_won("irse_al_mazo", winner_id, quitter_id, points)
         self._start_new_hand()
 
     def _handle_no_quiero(self, refuser_id):
         winner_id = self._get_opponent_id(refuser_id)
-        points = 1
-        if self._bet_level == 3: points = 2
-        elif self._bet_level == 4: points = 3
+        points = no_quiero_points(self._bet_level)
         
         self._scores[winner_id] += points
-        winner_name = self._get_name(winner_id)
-        refuser_name = self._get_name(refuser_id)
-        print(f"\n{'*'*60}")
-        print(f" {refuser_name} dijo NO QUIERO")
-        print(f" Gana la mano: {winner_name} (+{points} punto{'s' if points > 1 else ''})")
-        print(f"{'*'*60}\n")
+        self._mark_dirty("scores")
+        self._emit_hand_won("no_quiero", winner_id, refuser_id, points)
         self._start_new_hand()
 
     def _play_card(self, agent_id, card_index):
@@ -237,9 +471,12 @@ class TrucoEnvironment(SimulatedEnvironment):
         if 0 <= card_index < len(hand):
             card = hand.pop(card_index)
             self._table_cards.append((agent_id, card))
+            self._played_cards.append(card)
+            self._dirty_hands.add(agent_id)
+            self._mark_dirty("table", "turn")
             
             agent_name = self._get_name(agent_id)
-            self._last_log = f"{agent_name} jugó: {card}"
+            self._last_log = f"{agent_name} jugó: {CARD_NAMES[card]}"
             
             players_count = len(self._turn_order)
             current_idx = self._turn_order.index(agent_id)
@@ -257,21 +494,20 @@ class TrucoEnvironment(SimulatedEnvironment):
         p2_id, c2 = self._table_cards[1]
         
         winner_id = None
-        if c1.power > c2.power: winner_id = p1_id
-        elif c2.power > c1.power: winner_id = p2_id
+        if CARD_POWER[c1] > CARD_POWER[c2]: winner_id = p1_id
+        elif CARD_POWER[c2] > CARD_POWER[c1]: winner_id = p2_id
         
         self._round_history.append(winner_id)
-        self._table_cards = [] 
+        self._table_cards.clear()
+        self._mark_dirty("table", "history")
         
         hand_winner = self._check_hand_winner()
         
         if hand_winner is not None:
             points = self._bet_level
             self._scores[hand_winner] += points
-            winner_name = self._get_name(hand_winner)
-            print(f"\n{'*'*60}")
-            print(f" Gana la mano: {winner_name} (+{points} punto{'s' if points > 1 else ''})")
-            print(f"{'*'*60}\n")
+            self._mark_dirty("scores")
+            self._emit_hand_won("rounds", hand_winner, self._get_opponent_id(hand_winner), points)
             self._start_new_hand()
         else:
             self._current_round_number += 1
@@ -281,100 +517,200 @@ class TrucoEnvironment(SimulatedEnvironment):
                 self._current_turn_id = self._mano_player_id
 
     def _check_hand_winner(self):
-        history = self._round_history
-        if len(history) < 2: return None
+        return hand_winner(self._round_history, self._mano_player_id)
+
+    def add_statebuffer(self, agent_id: int, statebuffer) -> None:
+        with self._game_lock:
+            super().add_statebuffer(agent_id, statebuffer)
+            # Un buffer nuevo recibe el estado completo; luego solo recibe cambios
+            state = self.get_full_state(agent_id)
+            self._published[id(statebuffer)] = dict(state)
+            statebuffer.update(state)
+
+    def remove_statebuffer(self, agent_id: int, statebuffer) -> None:
+        with self._game_lock:
+            super().remove_statebuffer(agent_id, statebuffer)
+            # Si no, un buffer nuevo con el mismo id() heredaría lo ya publicado
+            self._published.pop(id(statebuffer), None)
+
+    def get_full_state(self, agent_id: int) -> dict:
+        """Estado completo que vería el agente (snapshot, sin depender de lo publicado)"""
+        state = self._shared_fields(STATE_FIELD_GROUPS)
+        state.update(self._agent_fields(agent_id, STATE_FIELD_GROUPS, True))
+        return state
+
+    def _shared_fields(self, dirty) -> dict:
+        """Campos iguales para todos los observadores, solo de los grupos modificados"""
+        fields = {}
+        if "scores" in dirty:
+            fields["scores"] = {self._get_name(aid): score for aid, score in self._scores.items()}
+        if "history" in dirty:
+            nombres_rondas = ["1ra", "2da", "3ra"]
+            fields["round_history"] = [
+                f"{nombres_rondas[i]}:{self._get_name(res) if res is not None else 'Parda'}"
+                for i, res in enumerate(self._round_history)
+            ]
+            fields["round_num"] = self._current_round_number
+        if "table" in dirty:
+            fields["table"] = [{"agent": self._get_name(pid), "card": CARD_NAMES[c]} for pid, c in self._table_cards]
+        if "mano" in dirty:
+            fields["mano_name"] = self._get_name(self._mano_player_id)
+        if "turn" in dirty:
+            fields["current_turn_name"] = self._get_name(self._current_turn_id)
+        if "game_over" in dirty:
+            winner_id = self.match_winner_id
+            fields["match_winner_name"] = self._get_name(winner_id) if winner_id is not None else None
+            fields["game_over"] = self._game_over
+        if "bet" in dirty:
+            fields["bet_status"] = BET_STATUS.get(self._bet_level, "Nada")
+            fields["waiting_response"] = self._waiting_response
+        return fields
+
+    def _agent_fields(self, agent_id, dirty, hand_dirty) -> dict:
+        """Campos propios de cada observador, solo de los grupos modificados"""
+        fields = {}
+        if hand_dirty:
+            fields["hand"] = [CARD_NAMES[c] for c in self._hands.get(agent_id, [])]
+        if "turn" in dirty or "bet" in dirty:
+            is_my_turn = (agent_id == self._current_turn_id) and not self._game_over
+            fields["my_turn"] = is_my_turn
+            fields["legal_actions"] = self._legal_actions(agent_id)
+            waiting_me = self._waiting_response and self._current_turn_id == agent_id
+            fields["status_msg"] = "Debes responder a la apuesta" if waiting_me else ""
+        if "opponent" in dirty:
+            opponent_id = self._get_opponent_id(agent_id)
+            fields["last_opponent_action"] = self._last_actions.get(opponent_id)
+            fields["opponent_name"] = self._get_name(opponent_id)
+        return fields
 
-        r1 = history[0]
-        r2 = history[1] if len(history) > 1 else None
-        
-        if r1 is not None and r1 == r2: return r1
-        if r1 is not None and r2 is None: return r1
-        if r1 is None and r2 is not None: return r2
-        
-        if len(history) == 3:
-            r3 = history[2]
-            if r3 is not None: return r3
-            if r3 is None:
-                if r1 is None and r2 is None: return self._mano_player_id
-                if r1 is not None: return r1
-        
-        return None
+    def _legal_actions(self, agent_id):
+        if agent_id == self._current_turn_id and not self._game_over:
+            return legal_action_names(self._bet_level, self._waiting_response)
+        return []
 
     def _update_all_buffers(self):
-        scores_named = {self._get_name(aid): score for aid, score in self._scores.items()}
-        
-        history_named = []
-        nombres_rondas = ["1ra", "2da", "3ra"]
-        for i, res in enumerate(self._round_history):
-            ganador = self._get_name(res) if res is not None else "Parda"
-            history_named.append(f"{nombres_rondas[i]}:{ganador}")
+        """Publica en cada statebuffer solo los campos que cambiaron para ese agente"""
+        dirty, dirty_hands = self._dirty, self._dirty_hands
+        if not dirty and not dirty_hands:
+            return
+        self._dirty, self._dirty_hands = set(), set()
 
-        table_named = [{"agent": self._get_name(pid), "card": str(c)} for pid, c in self._table_cards]
-        mano_name = self._get_name(self._mano_player_id)
-        current_turn_name = self._get_name(self._current_turn_id)
+        if not self._statebuffers:
+            return
 
-        match_winner_name = None
-        if self._game_over:
-            for aid, score in self._scores.items():
-                if score >= 15:
-                    match_winner_name = self._get_name(aid)
-                    break
-
-        for entry in self._statebuffers:
-            agent_id = entry["agent_id"]
-            buffer = entry["statebuffer"]
-            
-            # Calcular acciones legales para este agente
-            legal_actions = []
-            is_my_turn = (agent_id == self._current_turn_id) and not self._game_over
-            
-            if is_my_turn:
-                if self._waiting_response:
-                    legal_actions = ["quiero", "no_quiero"]
-                    if self._bet_level == 2: legal_actions.append("retruco")
-                    if self._bet_level == 3: legal_actions.append("vale4")
-                else:
-                    legal_actions.append("play_card")
-                    if self._bet_level == 1: 
-                        legal_actions.append("truco")
-                
-                legal_actions.append("irse_al_mazo")
-            
-            # Determinar bet_status
-            bet_status = "Nada"
-            if self._bet_level == 2:
-                bet_status = "Truco"
-            elif self._bet_level == 3:
-                bet_status = "Retruco"
-            elif self._bet_level == 4:
-                bet_status = "Vale Cuatro"
-            
-            # Mensaje de estado
-            status_msg = ""
-            if self._waiting_response and self._current_turn_id == agent_id:
-                status_msg = "Debes responder a la apuesta"
-            
-            # Última acción del oponente
-            opponent_id = self._get_opponent_id(agent_id)
-            last_opponent_action = self._last_actions.get(opponent_id)
-            opponent_name = self._get_name(opponent_id)
-            
-            state = {
-                "hand": [str(c) for c in self._hands.get(agent_id, [])],
-                "table": table_named,
-                "scores": scores_named,
-                "mano_name": mano_name,
-                "current_turn_name": current_turn_name,
-                "round_history": history_named,
-                "round_num": self._current_round_number,
-                "match_winner_name": match_winner_name,
-                "my_turn": is_my_turn,
-                "game_over": self._game_over,
-                "bet_status": bet_status,
-                "status_msg": status_msg,
-                "waiting_response": self._waiting_response,
-                "last_opponent_action": last_opponent_action,
-                "opponent_name": opponent_name,
-                "legal_actions": legal_actions
-            }
-            buffer.update(state)
\ No newline at end of file
+        shared = self._shared_fields(dirty)
+        for agent_id, buffers in tuple(self._statebuffers.items()):
+            fields = self._agent_fields(agent_id, dirty, agent_id in dirty_hands)
+            fields.update(shared)
+            for buffer in buffers:
+                published = self._published.setdefault(id(buffer), {})
+                delta = {key: value for key, value in fields.items() if published.get(key, _MISSING) != value}
+                if delta:
+                    published.update(delta)
+                    buffer.update_fields(delta)
+
+
+# --- Transiciones puras sobre TrucoState (para búsqueda y rollouts) ---
+def legal_actions(state: TrucoState):
+    """Acciones legales de quien tiene el turno, como tuplas (nombre, índice de carta o None)"""
+    if state.game_over or state.current_turn is None:
+        return []
+    actions = []
+    for name in legal_action_names(state.bet_level, state.waiting_response):
+        if name == "play_card":
+            actions.extend(("play_card", i) for i in range(len(state.hands[state.current_turn])))
+        else:
+            actions.append((name, None))
+    return actions
+
+
+def step(state: TrucoState, action, rng=None, deal=True) -> TrucoState:
+    """
+    Aplica la acción (nombre, índice) de quien tiene el turno con las mismas reglas que
+    TrucoEnvironment.take_action y devuelve el nuevo estado, sin modificar `state`.
+    Al terminar una mano reparte la siguiente con `rng` (random.Random o el módulo random);
+    con deal=False devuelve la mano terminada sin repartir (current_turn None).
+    """
+    if state.game_over or state.current_turn is None:
+        return state
+
+    action_name, index = action
+    seat = state.current_turn
+    opponent = 1 - seat
+
+    if action_name == "irse_al_mazo":
+        return _finish_hand(state, opponent, mazo_points(state.bet_level, state.waiting_response), rng, deal)
+
+    if state.waiting_response:
+        if action_name == "quiero":
+            if len(state.table) == 1:
+                turn = 1 - state.table[0][0]
+            elif state.round_history and state.round_history[-1] is not None:
+                turn = state.round_history[-1]
+            else:
+                turn = state.mano
+            return state._replace(waiting_response=False, current_turn=turn)
+        if action_name == "no_quiero":
+            return _finish_hand(state, opponent, no_quiero_points(state.bet_level), rng, deal)
+        if action_name in ("retruco", "vale4"):
+            return _raise_bet(state, seat, action_name)
+        return state
+
+    if action_name == "play_card":
+        hand = state.hands[seat]
+        if index is None or not 0 <= index < len(hand):
+            return state
+        hands = list(state.hands)
+        hands[seat] = hand[:index] + hand[index + 1:]
+        table = state.table + ((seat, hand[index]),)
+        played = state.played + (hand[index],)
+        if len(table) < 2:
+            return state._replace(hands=tuple(hands), table=table, played=played, current_turn=opponent)
+        return _resolve_round(state._replace(hands=tuple(hands), table=table, played=played), rng, deal)
+
+    if action_name == "truco" and state.bet_level == 1:
+        return _raise_bet(state, seat, "truco")
+    return state
+
+
+def _raise_bet(state, seat, bet_type):
+    return state._replace(bet_level=BET_LEVELS[bet_type], bet_caller=seat,
+                          waiting_response=True, current_turn=1 - seat)
+
+
+def _resolve_round(state, rng, deal):
+    (s1, c1), (s2, c2) = state.table
+    winner = None
+    if CARD_POWER[c1] > CARD_POWER[c2]: winner = s1
+    elif CARD_POWER[c2] > CARD_POWER[c1]: winner = s2
+
+    history = state.round_history + (winner,)
+    winner_of_hand = hand_winner(history, state.mano)
+    if winner_of_hand is not None:
+        return _finish_hand(state._replace(table=(), round_history=history), winner_of_hand,
+                            state.bet_level, rng, deal)
+    return state._replace(table=(), round_history=history, round_number=state.round_number + 1,
+                          current_turn=winner if winner is not None else state.mano)
+
+
+def _finish_hand(state, winner, points, rng, deal):
+    scores = list(state.scores)
+    scores[winner] += points
+    state = state._replace(scores=tuple(scores))
+
+    if any(score >= 15 for score in scores):
+        return state._replace(game_over=True)
+    if not deal:
+        return state._replace(hands=((), ()), table=(), current_turn=None)
+
+    # Mismo reparto que TrucoEnvironment._start_new_hand
+    deck = list(DECK)
+    (rng if rng is not None else random).shuffle(deck)
+    dealer = (state.dealer + 1) % 2
+    mano = (dealer + 1) % 2
+    return state._replace(
+        hands=((deck[-1], deck[-2], deck[-3]), (deck[-4], deck[-5], deck[-6])),
+        table=(), played=(), dealer=dealer, mano=mano, round_history=(), round_number=1,
+        bet_level=1, bet_caller=None, waiting_response=False, current_turn=mano,
+        hands_played=state.hands_played + 1,
+    )
@@ -0,0 +1,151 @@
+import mmap
+import os
+import tempfile
+import warnings
+from array import array
+from collections import Counter
+from functools import lru_cache
+from itertools import permutations
+from math import comb
+from trucoenvironment import CARD_POWER, hand_winner
+
+# Probabilidad de ganar la mano (sin contar apuestas) contra una mano rival uniforme entre
+# las cartas no vistas, suponiendo que ambos juegan sus cartas en orden aleatorio.
+# Solo importa el poder de cada carta, así que todo se calcula sobre multiconjuntos de
+# poderes ponderados por la cantidad de cartas de cada poder.
+
+MAX_POWER = max(CARD_POWER)
+POWER_COUNTS = tuple(CARD_POWER.count(p) for p in range(MAX_POWER + 1))
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "truco_equity.bin")
+
+ME, OPPONENT = 0, 1
+
+
+def _opponent_hands(counts, size):
+    """Multiconjuntos de poderes de tamaño `size` con la cantidad de manos reales que representan"""
+    def extend(power, remaining):
+        if remaining == 0:
+            yield (), 1
+            return
+        for p in range(power, MAX_POWER + 1):
+            available = counts[p]
+            for take in range(1, min(available, remaining) + 1):
+                for rest, weight in extend(p + 1, remaining - take):
+                    yield (p,) * take + rest, comb(available, take) * weight
+    return list(extend(1, size))
+
+
+@lru_cache(maxsize=None)
+def _win_fraction(mine, theirs, mano, history, my_table_power, table_power):
+    """Fracción de órdenes de juego (de ambos) en los que gano la mano"""
+    wins = total = 0
+    for my_order in permutations(mine):
+        if my_table_power is not None:
+            my_order = (my_table_power,) + my_order
+        for their_order in permutations(theirs):
+            if table_power is not None:
+                their_order = (table_power,) + their_order
+            rounds = list(history)
+            winner = None
+            for a, b in zip(my_order, their_order):
+                rounds.append(ME if a > b else OPPONENT if b > a else None)
+                winner = hand_winner(rounds, mano)
+                if winner is not None:
+                    break
+            wins += winner == ME
+            total += 1
+    return wins / total
+
+
+@lru_cache(maxsize=None)
+def _equity(mine, mano, history, my_table_power, table_power, counts):
+    size = len(mine) + (my_table_power is not None) - (table_power is not None)
+    weighted = total = 0
+    for theirs, weight in _opponent_hands(counts, size):
+        weighted += weight * _win_fraction(mine, theirs, mano, history, my_table_power, table_power)
+        total += weight
+    return weighted / total if total else 0.0
+
+
+def equity(my_cards, is_mano, round_history=(), opponent_table_card=None, seen=(), my_table_card=None):
+    """
+    Probabilidad exacta de ganar la mano dada la información visible.
+    :param my_cards: índices de mis cartas todavía en mano
+    :param round_history: resultado de cada ronda desde mi punto de vista (True ganada, False perdida, None parda)
+    :param opponent_table_card: carta que el rival ya jugó en la ronda actual, si la hay
+    :param seen: otras cartas ya vistas en la mano (jugadas en rondas anteriores)
+    :param my_table_card: carta que yo ya jugué en la ronda actual, si la hay
+    """
+    table = [card for card in (my_table_card, opponent_table_card) if card is not None]
+    counts = list(POWER_COUNTS)
+    for card in list(my_cards) + list(seen) + table:
+        counts[CARD_POWER[card]] -= 1
+    history = tuple(None if r is None else (ME if r else OPPONENT) for r in round_history)
+    my_table_power = CARD_POWER[my_table_card] if my_table_card is not None else None
+    table_power = CARD_POWER[opponent_table_card] if opponent_table_card is not None else None
+    mine = tuple(sorted(CARD_POWER[c] for c in my_cards))
+    return _equity(mine, ME if is_mano else OPPONENT, history, my_table_power, table_power, tuple(counts))
+
+
+# --- Tabla precalculada de manos completas, en disco y mapeada en memoria ---
+# Solo se guardan las manos de 3 cartas antes de jugar ninguna (mano y pie, 27 KB).
+# La equidad condicionada a cartas ya jugadas no está en la tabla: equity() la calcula
+# en cada proceso y la memoriza con lru_cache, así que no se comparte entre procesos.
+def _table_index(powers, is_mano):
+    a, b, c = sorted(powers)
+    return (((1 if is_mano else 0) * (MAX_POWER + 1) + a) * (MAX_POWER + 1) + b) * (MAX_POWER + 1) + c
+
+
+def _feasible(powers):
+    return all(POWER_COUNTS[p] >= n for p, n in Counter(powers).items())
+
+
+def build_table(path=DEFAULT_TABLE_PATH):
+    """Calcula la equidad de cada mano de 3 cartas (como mano y como pie) y la guarda en `path`"""
+    table = array("f", [0.0]) * (2 * (MAX_POWER + 1) ** 3)
+    for powers, _ in _opponent_hands(POWER_COUNTS, 3):
+        counts = list(POWER_COUNTS)
+        for p in powers:
+            counts[p] -= 1
+        for is_mano in (True, False):
+            table[_table_index(powers, is_mano)] = _equity(powers, ME if is_mano else OPPONENT, (), None, None,
+                                                           tuple(counts))
+    # Se escribe aparte y se reemplaza de una vez: otro proceso nunca ve un archivo a medio escribir
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile("wb", dir=directory, prefix=".truco_equity.", delete=False) as f:
+        table.tofile(f)
+    try:
+        os.chmod(f.name, 0o644)
+        os.replace(f.name, path)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+
+class EquityTable:
+    """Tabla de equidad de manos de 3 cartas sin jugar; se carga al instante con mmap"""
+    def __init__(self, path=DEFAULT_TABLE_PATH):
+        if not os.path.exists(path):
+            warnings.warn(f"Equity table {path} not found; building it now, which takes several seconds. "
+                          f"Build it once beforehand with: python trucoequity.py", RuntimeWarning, stacklevel=2)
+            build_table(path)
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._values = memoryview(self._mmap).cast("f")
+
+    def hand_strength(self, cards, is_mano):
+        """Probabilidad de ganar la mano con estas 3 cartas, antes de jugar ninguna"""
+        powers = [CARD_POWER[c] for c in cards]
+        if not _feasible(powers):
+            raise ValueError(f"Impossible hand: {cards}")
+        return self._values[_table_index(powers, is_mano)]
+
+    def close(self):
+        self._values.release()
+        self._mmap.close()
+
+
+if __name__ == '__main__':
+    build_table()
+    print(f"Tabla de equidad guardada en {DEFAULT_TABLE_PATH}")
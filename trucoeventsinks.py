@@ -0,0 +1,17 @@
+from eventsinks import IEventSink
+
+
+class TrucoConsoleEventSink(IEventSink):
+    """Imprime el resultado de cada mano con el mismo banner que usaba el entorno"""
+    def emit(self, event: dict):
+        if event.get("type") != "hand_won":
+            return
+
+        points = event["points"]
+        print(f"\n{'*'*60}")
+        if event["reason"] == "irse_al_mazo":
+            print(f" {event['loser_name']} se fue al mazo")
+        elif event["reason"] == "no_quiero":
+            print(f" {event['loser_name']} dijo NO QUIERO")
+        print(f" Gana la mano: {event['winner_name']} (+{points} punto{'s' if points > 1 else ''})")
+        print(f"{'*'*60}\n")
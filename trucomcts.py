@@ -0,0 +1,132 @@
+import math
+import random
+import time
+from trucoenvironment import DECK, TrucoState, legal_actions, step
+
+# ISMCTS con un solo árbol de conjuntos de información (SO-ISMCTS): cada nodo agrupa
+# todos los estados que el agente que busca no puede distinguir. Cada iteración
+# "determiniza" la mano oculta del rival muestreándola entre las cartas no vistas.
+
+
+def determinize(state: TrucoState, seat: int, rng) -> TrucoState:
+    """Completa la mano oculta del rival con cartas no vistas elegidas al azar"""
+    opponent = 1 - seat
+    seen = set(state.hands[seat]) | set(state.played)
+    unseen = [card for card in DECK if card not in seen]
+    hands = list(state.hands)
+    hands[opponent] = tuple(rng.sample(unseen, len(hands[opponent])))
+    return state._replace(hands=tuple(hands))
+
+
+def info_key(state: TrucoState, seat: int):
+    """Clave del conjunto de información del asiento `seat` (oculta la mano del rival)"""
+    return (state.hands[seat], len(state.hands[1 - seat]), state.table, state.played,
+            state.round_history, state.bet_level, state.waiting_response, state.current_turn)
+
+
+def action_key(state: TrucoState, action):
+    """Las cartas se identifican por valor, no por posición, para valer en toda determinización"""
+    name, index = action
+    if name == "play_card":
+        return name, state.hands[state.current_turn][index]
+    return action
+
+
+def to_action(state: TrucoState, key):
+    name, card = key
+    if name == "play_card":
+        return name, state.hands[state.current_turn].index(card)
+    return key
+
+
+def is_hand_over(state: TrucoState):
+    return state.game_over or state.current_turn is None
+
+
+class Node:
+    __slots__ = ("visits", "values", "available")
+
+    def __init__(self):
+        self.visits = {}      # acción -> veces elegida
+        self.values = {}      # acción -> suma de recompensas del que actúa
+        self.available = {}   # acción -> veces que estuvo disponible
+
+    def select(self, keys, exploration, rng):
+        for key in keys:
+            self.available[key] = self.available.get(key, 0) + 1
+        untried = [key for key in keys if key not in self.visits]
+        if untried:
+            return rng.choice(untried)
+        return max(keys, key=lambda k: self.values[k] / self.visits[k]
+                   + exploration * math.sqrt(math.log(self.available[k]) / self.visits[k]))
+
+    def update(self, key, reward):
+        self.visits[key] = self.visits.get(key, 0) + 1
+        self.values[key] = self.values.get(key, 0.0) + reward
+
+
+class ISMCTS:
+    """Árbol de búsqueda para un asiento; se reutiliza mientras dure la mano"""
+    def __init__(self, seat: int, exploration=0.7, rng=None):
+        self.seat = seat
+        self.exploration = exploration
+        self.nodes = {}
+        self.iterations = 0
+        self._rng = rng if rng is not None else random.Random()
+
+    def search(self, state: TrucoState, time_budget=None, max_iterations=None):
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        done = 0
+        while (max_iterations is None or done < max_iterations) and \
+                (deadline is None or time.perf_counter() < deadline):
+            self._iterate(determinize(state, self.seat, self._rng))
+            done += 1
+        self.iterations += done
+        return self.root_stats(state)
+
+    def _iterate(self, state):
+        start_scores = state.scores
+        path = []
+        while not is_hand_over(state):
+            key = info_key(state, self.seat)
+            node = self.nodes.get(key)
+            expanding = node is None
+            if expanding:
+                node = self.nodes[key] = Node()
+            keys = [action_key(state, action) for action in legal_actions(state)]
+            chosen = node.select(keys, self.exploration, self._rng)
+            path.append((node, chosen, state.current_turn))
+            state = step(state, to_action(state, chosen), deal=False)
+            if expanding:
+                break
+
+        # Simulación aleatoria hasta el final de la mano
+        while not is_hand_over(state):
+            state = step(state, self._rng.choice(legal_actions(state)), deal=False)
+
+        mine = state.scores[self.seat] - start_scores[self.seat]
+        theirs = state.scores[1 - self.seat] - start_scores[1 - self.seat]
+        reward = (mine - theirs) / 4.0
+        for node, key, actor in path:
+            node.update(key, reward if actor == self.seat else -reward)
+
+    def root_stats(self, state):
+        """acción -> (visitas, suma de recompensas) en la raíz"""
+        node = self.nodes.get(info_key(state, self.seat))
+        if node is None:
+            return {}
+        return {key: (node.visits[key], node.values[key]) for key in node.visits}
+
+    def merge_root(self, state, stats):
+        """Suma a la raíz las estadísticas de una búsqueda hecha en otro proceso"""
+        node = self.nodes.setdefault(info_key(state, self.seat), Node())
+        for key, (visits, value) in stats.items():
+            node.visits[key] = node.visits.get(key, 0) + visits
+            node.values[key] = node.values.get(key, 0.0) + value
+            node.available[key] = node.available.get(key, 0) + visits
+
+
+def search_worker(state, seat, time_budget, max_iterations, exploration, seed):
+    """Búsqueda independiente para un proceso del pool (paralelismo de raíz)"""
+    tree = ISMCTS(seat, exploration, random.Random(seed))
+    return tree.search(state, time_budget, max_iterations)
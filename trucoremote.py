@@ -0,0 +1,41 @@
+class RemoteTrucoTable:
+    """
+    Una mesa de un TrucoPyroAdapter remoto vista con la interfaz de environment
+    que usan los TrucoAgent (add, get_property, get_properties, take_action).
+    """
+    def __init__(self, lobby, table_id: str, name: str = None):
+        self._lobby = lobby
+        self._table_id = table_id
+        self._name = name
+
+    @property
+    def table_id(self):
+        return self._table_id
+
+    def add(self, agent_id: int) -> None:
+        if not self._lobby.join(self._table_id, agent_id, self._name):
+            raise RuntimeError(f"Table {self._table_id} is full")
+
+    def set_agent_name(self, agent_id: int, name: str) -> None:
+        self._lobby.set_agent_name(self._table_id, agent_id, name)
+
+    def create_statebuffer(self, agent_id: int) -> str:
+        return self._lobby.create_statebuffer(self._table_id, agent_id)
+
+    def subscribe(self, agent_id: int, callback) -> None:
+        self._lobby.subscribe(self._table_id, agent_id, callback)
+
+    def unsubscribe(self, agent_id: int, callback) -> None:
+        self._lobby.unsubscribe(self._table_id, agent_id, callback)
+
+    def get_property(self, agent_id: int, property_name: str) -> dict:
+        return self._lobby.get_property(self._table_id, agent_id, property_name)
+
+    def get_properties(self, agent_id: int, property_names: list) -> dict:
+        return self._lobby.get_properties(self._table_id, agent_id, property_names)
+
+    def take_action(self, agent_id: int, action_name: str, params: dict = {}) -> bool:
+        return self._lobby.take_action(self._table_id, agent_id, action_name, params)
+
+    def take_actions(self, batch: list) -> list:
+        return self._lobby.take_actions(self._table_id, batch)
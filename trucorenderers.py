@@ -58,7 +58,7 @@ class TrucoConsoleRenderer(IRenderer):
             return
         
         # Evitar renderizar el mismo turno múltiples veces
-        current_turn = (state.get('my_turn'), state.get('current_turn_name'))
+        current_turn = (state.get('my_turn'), state.get('current_turn_name'), state.get('game_over'))
         if current_turn == self._last_rendered_turn and not state.get('my_turn'):
             return
             
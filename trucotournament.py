@@ -0,0 +1,118 @@
+import multiprocessing
+import random
+from trucobatch import play_match
+
+
+class EloRatings:
+    """Ratings Elo acumulados a partir de resultados de partidos"""
+    def __init__(self, names, initial=1500.0, k=16.0):
+        self._k = k
+        self.ratings = {name: initial for name in names}
+
+    def expected(self, a, b):
+        return 1.0 / (1.0 + 10 ** ((self.ratings[b] - self.ratings[a]) / 400.0))
+
+    def update(self, a, b, score_a):
+        """score_a: 1 si ganó a, 0 si ganó b"""
+        delta = self._k * (score_a - self.expected(a, b))
+        self.ratings[a] += delta
+        self.ratings[b] -= delta
+
+
+def round_robin_pairings(names):
+    """Todos contra todos: cada par de participantes una vez"""
+    return [(a, b) for i, a in enumerate(names) for b in names[i + 1:]]
+
+
+def swiss_pairings(standings, ratings, played, byes=()):
+    """
+    Empareja participantes con puntaje similar evitando revanchas cuando es posible.
+    :param byes: participantes que ya quedaron libres en rondas anteriores
+    :return: (lista de pares, participante libre o None)
+    """
+    order = sorted(standings, key=lambda name: (-standings[name], -ratings[name], name))
+    bye = None
+    if len(order) % 2:
+        # Queda libre el peor ubicado que todavía no lo estuvo (si todos lo estuvieron, el último)
+        bye_index = next((i for i in range(len(order) - 1, -1, -1) if order[i] not in byes), len(order) - 1)
+        bye = order.pop(bye_index)
+
+    pairs = []
+    while order:
+        a = order.pop(0)
+        rival_index = next((i for i, b in enumerate(order) if frozenset((a, b)) not in played), 0)
+        pairs.append((a, order.pop(rival_index)))
+    return pairs, bye
+
+
+def _play_task(task):
+    """Ejecuta un partido en un proceso del pool (un entorno propio por partido)"""
+    a_name, a_factory, b_name, b_factory, seed = task
+    env, agents = play_match([a_factory, b_factory], seed=seed)
+    winner = a_name if agents[0].id == env.match_winner_id else b_name
+    return a_name, b_name, winner, env.hands_played
+
+
+class Tournament:
+    """
+    Torneo de agentes de Truco. Los partidos de cada ronda se reparten en un pool
+    de procesos y cada uno usa una semilla derivada de la semilla del torneo,
+    por lo que el resultado no depende de la cantidad de procesos.
+    """
+    def __init__(self, entries: dict, games_per_pair=2, workers=None, seed=0):
+        """
+        :param entries: nombre -> fábrica de agentes (debe poder serializarse con pickle)
+        :param games_per_pair: partidos por emparejamiento, alternando asientos
+        """
+        self._entries = entries
+        self._games_per_pair = games_per_pair
+        self._workers = workers
+        self._seeds = random.Random(seed)
+
+        names = list(entries)
+        self.elo = EloRatings(names)
+        self.standings = {name: 0 for name in names}
+        self.games = {name: 0 for name in names}
+        self.byes = {name: 0 for name in names}   # rondas libres: suman puntos, no partidos
+        self.hands = 0
+        self._played = set()
+
+    def _tasks(self, pairs):
+        tasks = []
+        for a, b in pairs:
+            for game in range(self._games_per_pair):
+                first, second = (a, b) if game % 2 == 0 else (b, a)
+                tasks.append((first, self._entries[first], second, self._entries[second],
+                              self._seeds.getrandbits(64)))
+        return tasks
+
+    def _play_round(self, pool, pairs):
+        # imap conserva el orden de las tareas: los ratings se actualizan siempre igual
+        for a, b, winner, hands in pool.imap(_play_task, self._tasks(pairs), chunksize=4):
+            self.elo.update(a, b, 1.0 if winner == a else 0.0)
+            self.standings[winner] += 1
+            self.games[a] += 1
+            self.games[b] += 1
+            self.hands += hands
+        self._played.update(frozenset(pair) for pair in pairs)
+
+    def run_round_robin(self):
+        with multiprocessing.Pool(self._workers) as pool:
+            self._play_round(pool, round_robin_pairings(list(self._entries)))
+        return self.results()
+
+    def run_swiss(self, rounds: int):
+        with multiprocessing.Pool(self._workers) as pool:
+            for _ in range(rounds):
+                had_bye = {name for name, count in self.byes.items() if count}
+                pairs, bye = swiss_pairings(self.standings, self.elo.ratings, self._played, had_bye)
+                if bye is not None:
+                    self.standings[bye] += self._games_per_pair
+                    self.byes[bye] += 1
+                self._play_round(pool, pairs)
+        return self.results()
+
+    def results(self):
+        """Tabla ordenada por rating: lista de (nombre, rating, puntos, partidos, rondas libres)"""
+        return sorted(((name, self.elo.ratings[name], self.standings[name], self.games[name], self.byes[name])
+                       for name in self._entries), key=lambda row: -row[1])
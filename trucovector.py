@@ -0,0 +1,225 @@
+import numpy as np
+from trucoenvironment import CARD_POWER, DECK
+
+# Acciones codificadas como enteros. Las cartas se juegan por posición fija en la mano
+# (0, 1 o 2): una carta jugada deja su lugar vacío (-1) en vez de correr a las demás.
+PLAY_0, PLAY_1, PLAY_2, TRUCO, QUIERO, NO_QUIERO, RETRUCO, VALE4, IRSE_AL_MAZO = range(9)
+N_ACTIONS = 9
+ACTION_NAMES = ("play_card", "play_card", "play_card", "truco", "quiero", "no_quiero",
+                "retruco", "vale4", "irse_al_mazo")
+
+POWER = np.array(CARD_POWER + (-1,), dtype=np.int8)  # POWER[-1] == -1: lugar vacío
+
+# Resultado de una ronda en `history`
+NOT_PLAYED = -2
+PARDA = -1
+
+
+class VectorTrucoSimulator:
+    """
+    Juega muchos partidos de Truco a la vez sobre arrays de NumPy, con las mismas
+    reglas que TrucoEnvironment. Los jugadores se identifican por asiento (0 o 1).
+    """
+    def __init__(self, n_games: int, seed=None, target_score=15):
+        self._rng = np.random.default_rng(seed)
+        self.n_games = n_games
+        self.target_score = target_score
+
+        self.hands = np.full((n_games, 2, 3), -1, dtype=np.int8)   # índice de carta, -1 = jugada
+        self.table = np.full((n_games, 2), -1, dtype=np.int8)      # carta de cada asiento en la ronda
+        self.history = np.full((n_games, 3), NOT_PLAYED, dtype=np.int8)
+        self.round = np.zeros(n_games, dtype=np.int8)
+        self.scores = np.zeros((n_games, 2), dtype=np.int16)
+        self.bet_level = np.ones(n_games, dtype=np.int8)
+        self.waiting_response = np.zeros(n_games, dtype=bool)
+        self.turn = np.zeros(n_games, dtype=np.int8)
+        self.mano = np.zeros(n_games, dtype=np.int8)
+        self.dealer = self._rng.integers(0, 2, n_games, dtype=np.int8)
+        self.active = np.ones(n_games, dtype=bool)
+        self.hands_played = np.zeros(n_games, dtype=np.int32)
+
+        self._start_new_hand(np.arange(n_games))
+
+    # --- Manos ---
+    def _start_new_hand(self, games):
+        finished = (self.scores[games] >= self.target_score).any(axis=1)
+        self.active[games[finished]] = False
+        games = games[~finished]
+        if len(games) == 0:
+            return
+
+        self.dealer[games] = 1 - self.dealer[games]
+        self.mano[games] = 1 - self.dealer[games]
+
+        # Mezcla independiente por partido: las 6 primeras cartas de cada permutación
+        dealt = np.argsort(self._rng.random((len(games), len(DECK))), axis=1)[:, :6].astype(np.int8)
+        self.hands[games] = dealt.reshape(len(games), 2, 3)
+        self.table[games] = -1
+        self.history[games] = NOT_PLAYED
+        self.round[games] = 0
+        self.bet_level[games] = 1
+        self.waiting_response[games] = False
+        self.turn[games] = self.mano[games]
+        self.hands_played[games] += 1
+
+    def _award(self, games, winners, points):
+        self.scores[games, winners] += points
+        self._start_new_hand(games)
+
+    # --- Observaciones ---
+    def legal_mask(self, games, seat):
+        hands = self.hands[games, seat]
+        bet = self.bet_level[games]
+        waiting = self.waiting_response[games]
+
+        mask = np.zeros((len(games), N_ACTIONS), dtype=bool)
+        mask[:, :3] = (hands >= 0) & ~waiting[:, None]
+        mask[:, TRUCO] = ~waiting & (bet == 1)
+        mask[:, QUIERO] = waiting
+        mask[:, NO_QUIERO] = waiting
+        mask[:, RETRUCO] = waiting & (bet == 2)
+        mask[:, VALE4] = waiting & (bet == 3)
+        mask[:, IRSE_AL_MAZO] = True
+        return mask
+
+    def observe(self, games, seat):
+        """Observación por lotes del asiento `seat` en los partidos `games` (solo información visible)"""
+        opponent = 1 - seat
+        history = self.history[games]
+        return {
+            "games": games,
+            "seat": seat,
+            "hand": self.hands[games, seat],
+            "hand_power": POWER[self.hands[games, seat]],
+            "opponent_table_power": POWER[self.table[games, opponent]],
+            "round": self.round[games],
+            "round_won": history == seat,
+            "round_lost": history == opponent,
+            "round_parda": history == PARDA,
+            "is_mano": self.mano[games] == seat,
+            "bet_level": self.bet_level[games],
+            "waiting_response": self.waiting_response[games],
+            "my_score": self.scores[games, seat],
+            "opponent_score": self.scores[games, opponent],
+            "legal_mask": self.legal_mask(games, seat),
+        }
+
+    # --- Acciones ---
+    def apply(self, games, seat, actions):
+        """Aplica una acción por partido para el asiento que tiene el turno"""
+        actions = np.asarray(actions)
+        legal = self.legal_mask(games, seat)[np.arange(len(games)), actions]
+        if not legal.all():
+            raise ValueError(f"Illegal actions for games {games[~legal].tolist()}")
+
+        opponent = 1 - seat
+
+        quit_ = actions == IRSE_AL_MAZO
+        if quit_.any():
+            g = games[quit_]
+            # Irse con una apuesta pendiente paga lo último aceptado
+            points = self.bet_level[g] - self.waiting_response[g]
+            self._award(g, np.full(len(g), opponent), points)
+
+        refuse = actions == NO_QUIERO
+        if refuse.any():
+            g = games[refuse]
+            self._award(g, np.full(len(g), opponent), self.bet_level[g] - 1)
+
+        accept = actions == QUIERO
+        if accept.any():
+            g = games[accept]
+            self.waiting_response[g] = False
+            one_on_table = (self.table[g] >= 0).sum(axis=1) == 1
+            last_round = np.maximum(self.round[g] - 1, 0)
+            last_winner = np.where(self.round[g] > 0, self.history[g, last_round], PARDA)
+            leader = np.where(last_winner >= 0, last_winner, self.mano[g])
+            # Con una carta en mesa juega quien todavía no jugó en la ronda
+            self.turn[g] = np.where(one_on_table, np.argmin(self.table[g], axis=1), leader)
+
+        for action, level in ((TRUCO, 2), (RETRUCO, 3), (VALE4, 4)):
+            raise_ = actions == action
+            if raise_.any():
+                g = games[raise_]
+                self.bet_level[g] = level
+                self.waiting_response[g] = True
+                self.turn[g] = opponent
+
+        play = actions <= PLAY_2
+        if play.any():
+            g = games[play]
+            slots = actions[play]
+            self.table[g, seat] = self.hands[g, seat, slots]
+            self.hands[g, seat, slots] = -1
+            complete = (self.table[g] >= 0).all(axis=1)
+            self.turn[g[~complete]] = opponent
+            if complete.any():
+                self._resolve_round(g[complete])
+
+    def _resolve_round(self, games):
+        power = POWER[self.table[games]]
+        winner = np.where(power[:, 0] > power[:, 1], 0, np.where(power[:, 1] > power[:, 0], 1, PARDA))
+        self.history[games, self.round[games]] = winner
+        self.table[games] = -1
+
+        hand_winner = self._hand_winner(games)
+        done = hand_winner >= 0
+        if done.any():
+            g = games[done]
+            self._award(g, hand_winner[done], self.bet_level[g])
+
+        g = games[~done]
+        self.round[g] += 1
+        self.turn[g] = np.where(winner[~done] >= 0, winner[~done], self.mano[g])
+
+    def _hand_winner(self, games):
+        """Versión vectorizada de TrucoEnvironment._check_hand_winner (-1 si la mano sigue)"""
+        r1, r2, r3 = self.history[games].T
+        played = self.round[games] + 1
+        mano = self.mano[games]
+        return np.select(
+            [played < 2,
+             (r1 >= 0) & (r1 == r2),
+             (r1 >= 0) & (r2 == PARDA),
+             (r1 == PARDA) & (r2 >= 0),
+             played < 3,
+             r3 >= 0,
+             (r1 == PARDA) & (r2 == PARDA),
+             r1 >= 0],
+            [-1, r1, r1, r2, -1, r3, mano, r1],
+            default=-1,
+        )
+
+    # --- Bucle principal ---
+    def step(self, policies):
+        """
+        Un paso en todos los partidos activos: cada asiento con el turno elige una acción.
+        :param policies: dos callables observación -> array de acciones, uno por asiento
+        """
+        for seat in (0, 1):
+            games = np.flatnonzero(self.active & (self.turn == seat))
+            if len(games):
+                self.apply(games, seat, policies[seat](self.observe(games, seat)))
+
+    def play(self, policies, max_steps=100000):
+        steps = 0
+        while self.active.any() and steps < max_steps:
+            self.step(policies)
+            steps += 1
+        return {
+            "winners": np.argmax(self.scores, axis=1),
+            "scores": self.scores.copy(),
+            "hands_played": self.hands_played.copy(),
+            "steps": steps,
+            "finished": ~self.active,
+        }
+
+
+def random_policy(seed=None):
+    """Política uniforme entre las acciones legales (como RandomTrucoAgent)"""
+    rng = np.random.default_rng(seed)
+
+    def policy(observation):
+        mask = observation["legal_mask"]
+        return np.argmax(rng.random(mask.shape) * mask, axis=1)
+    return policy
@@ -1,6 +1,8 @@
 from environments import SimulatedSensor, SimulatedActuator, SimulatedEnvironment
 from agents import Agent
 from random import randrange
+from bisect import bisect_left
+from dirtset import DirtSet
 
 
 class LocationSensor(SimulatedSensor):
@@ -17,6 +19,14 @@ class DirtSensor(SimulatedSensor):
         return response["dirty"]
 
 
+class NeighbourhoodSensor(SimulatedSensor):
+    """Location, dirt and other agents within the environment's view radius, in a single call"""
+
+    def sense(self):
+        response = self._env.get_property(self._agent.id, property_name="neighbourhood")
+        return response["neighbourhood"]
+
+
 from enum import Enum, unique
 
 
@@ -103,3 +113,152 @@ class VacuumAgent(Agent):
     def behave(self):
         percept = self._perceive()
         self._act(percept)
+
+
+INFINITY = float("inf")
+
+
+class DistanceField:
+    """
+    Distance from every cell of the strip to the nearest target, kept across steps. On a
+    strip the BFS field is piecewise linear between consecutive targets, so it is cached
+    as those breakpoints (the sorted targets): a distance is two neighbours away and a
+    change only touches the breakpoint added or removed, never the cells around it.
+    """
+    def __init__(self, targets=()):
+        self.rebuild(targets)
+
+    def rebuild(self, targets) -> None:
+        self._targets = sorted(set(targets))
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    def distance(self, x: int, side: int = None):
+        """Distance to the nearest target; only those to the left (-1) or right (1) of x if `side` is given"""
+        targets = self._targets
+        i = bisect_left(targets, x)
+        right = targets[i] - x if i < len(targets) else INFINITY
+        left = x - targets[i - 1] if i > 0 else INFINITY
+        if side is None:
+            return min(left, right)
+        return left if side < 0 else right
+
+    def add(self, x: int) -> None:
+        i = bisect_left(self._targets, x)
+        if i == len(self._targets) or self._targets[i] != x:
+            self._targets.insert(i, x)
+
+    def remove(self, x: int) -> None:
+        i = bisect_left(self._targets, x)
+        if i < len(self._targets) and self._targets[i] == x:
+            del self._targets[i]
+
+    def update(self, added, removed) -> None:
+        if len(added) + len(removed) > 64:
+            # Large change (first state, long gap between reads): rebuild at once
+            self.rebuild(set(self._targets).difference(removed).union(added))
+            return
+        for x in removed:
+            self.remove(x)
+        for x in added:
+            self.add(x)
+
+    def step_towards(self, x: int, heading: int) -> int:
+        """-1 or 1 towards the nearest target (ties keep `heading`), 0 on a target, None without targets"""
+        if not self._targets:
+            return None
+        left, right = self.distance(x, -1), self.distance(x, 1)
+        if left == 0 or right == 0:
+            return 0
+        if left == right:
+            return heading
+        return -1 if left < right else 1
+
+
+class PlanningVacuumAgent(VacuumAgent):
+    """
+    Vacuum agent that routes to the nearest dirt instead of wandering. Its belief map is a
+    DistanceField whose targets are the cells believed dirty: the dirt of its statebuffer
+    when one is set, otherwise every cell it has not seen clean yet (so it sweeps the
+    strip). Each neighbourhood percept corrects the cells in view.
+    """
+    def __init__(self, env: SimulatedEnvironment):
+        super().__init__(env)
+        self.remove_sensor("location_sensor")
+        self.remove_sensor("dirt_sensor")
+        neighbourhood = NeighbourhoodSensor(env)
+        neighbourhood.agent = self
+        self.add_sensor("neighbourhood", neighbourhood)
+
+        self._statebuffer = None
+        self._field = None
+        self._dirt = None                   # last dirt read from the statebuffer
+        self._heading = 1
+        self._moved_from = None             # location of the last move, to notice a blocked one
+
+    @property
+    def statebuffer(self):
+        return self._statebuffer
+
+    @statebuffer.setter
+    def statebuffer(self, statebuffer):
+        """Statebuffer of this agent to read the dirt from; set it before the first behave()"""
+        self._statebuffer = statebuffer
+
+    def _perceive(self):
+        percept = super()._perceive()
+        percept["state"] = self._statebuffer.get_state() if self._statebuffer is not None else None
+        return percept
+
+    def _update_belief(self, neighbourhood, state):
+        length = neighbourhood["length"]
+        if self._field is None:
+            self._field = DistanceField(() if self._statebuffer is not None else range(length))
+
+        if state is not None:
+            dirt = state["dirt_location"]
+            if self._dirt is None:
+                added, removed = list(dirt), []
+            elif isinstance(dirt, DirtSet) and isinstance(self._dirt, DirtSet):
+                added, removed = dirt.changes_from(self._dirt)
+            else:
+                added, removed = list(set(dirt) - set(self._dirt)), list(set(self._dirt) - set(dirt))
+            self._dirt = dirt
+            self._field.update(added, removed)
+
+        # What the agent sees now overrides the statebuffer, which may lag behind
+        location, radius = neighbourhood["location"], neighbourhood["radius"]
+        seen_dirt = {location + offset for offset in neighbourhood["dirt"]}
+        for x in range(max(location - radius, 0), min(location + radius + 1, length)):
+            if x in seen_dirt:
+                self._field.add(x)
+            else:
+                self._field.remove(x)
+
+    def function(self, percept):
+        neighbourhood = percept["neighbourhood"]
+        self._update_belief(neighbourhood, percept["state"])
+        location = neighbourhood["location"]
+        blocked, self._moved_from = self._moved_from == location, None
+        if neighbourhood["dirty"]:
+            return {"name": "clean"}
+        step = self._field.step_towards(location, self._heading)
+        if blocked and step == self._heading:
+            # The last move did not happen (another agent holds the cell, as on a grid): turn
+            # back half of the times if there is dirt behind, otherwise wait. The coin keeps
+            # two agents facing each other from turning back and forth in lockstep
+            turn_back = randrange(2) and self._field.distance(location, -step) < INFINITY
+            step = -step if turn_back else None
+        if step is None or step == 0:
+            return {"name": "idle"}
+        self._heading = step
+        self._moved_from = location
+        direction = MoveDirection.RIGHT if step > 0 else MoveDirection.LEFT
+        return {"name": "move", "params": {"direction": direction}}
+
+    def print_state(self):
+        neighbourhood = self._sensors["neighbourhood"].sense()
+        print("Estoy en la posición {} y la celda está {}; suciedad conocida: {}".format(
+            neighbourhood["location"], "Sucia" if neighbourhood["dirty"] else "Limpia",
+            len(self._field) if self._field is not None else "?"))
@@ -1,43 +1,97 @@
 import random
+import threading
+from collections.abc import Mapping
+from contextlib import ExitStack
 
+from dirtset import DirtSet
 from statebuffer import IStateBuffer
 from environments import SimulatedEnvironment
 
 
+class BucketIndex:
+    """Spatial index of the agents on the strip: buckets of `bucket_size` cells with the agents in them"""
+
+    def __init__(self, bucket_size: int = 64):
+        self._bucket_size = bucket_size
+        self._buckets = {}                              # maps bucket number with the agent ids in it
+        self._lock = threading.Lock()
+
+    def add(self, agent_id: int, location: int) -> None:
+        with self._lock:
+            self._buckets.setdefault(location // self._bucket_size, set()).add(agent_id)
+
+    def remove(self, agent_id: int, location: int) -> None:
+        with self._lock:
+            bucket = self._buckets.get(location // self._bucket_size)
+            if bucket is not None:
+                bucket.discard(agent_id)
+                if not bucket:
+                    del self._buckets[location // self._bucket_size]
+
+    def move(self, agent_id: int, old: int, new: int) -> None:
+        if old // self._bucket_size != new // self._bucket_size:
+            self.remove(agent_id, old)
+            self.add(agent_id, new)
+
+    def query(self, start: int, stop: int) -> list:
+        """Agents in the buckets overlapping [start, stop); callers filter by exact location"""
+        with self._lock:
+            found = []
+            for number in range(start // self._bucket_size, (stop - 1) // self._bucket_size + 1):
+                found.extend(self._buckets.get(number, ()))
+            return found
+
+
 class VacuumEnvironment(SimulatedEnvironment):
-    def __new__(cls, length: int, random_dirt=False):
+    def __new__(cls, length: int, random_dirt=False, view_radius: int = 2):
         if length <= 0:
             raise ValueError
         else:
             return super().__new__(cls)
 
-    def __init__(self, length: int, random_dirt=False):
+    def __init__(self, length: int, random_dirt=False, view_radius: int = 2):
         super(VacuumEnvironment, self).__init__()
         self._length = length
+        self._view_radius = view_radius                 # cells seen on each side by the neighbourhood sensor
         self._agents_locations = {}                     # maps agent id with its location
-        self._dirt_locations = set()
+        self._index = BucketIndex()
+        self._dirt_locations = DirtSet(length)          # immutable: every change is a new version
+        self._dirt_lock = threading.Lock()              # serializes the writers of the dirt
         if random_dirt:
             self.random_dirt(length // 2)
 
     def add(self, agent_id: int) -> None:
         super(VacuumEnvironment, self).add(agent_id)
-        self._agents_locations[agent_id] = 0
+        if agent_id not in self._agents_locations:
+            self._agents_locations[agent_id] = 0
+            self._index.add(agent_id, 0)
 
     def remove(self, agent_id: int) -> None:
         super(VacuumEnvironment, self).remove(agent_id)
-        self._agents_locations.pop(agent_id, None)
+        location = self._agents_locations.pop(agent_id, None)
+        if location is not None:
+            self._index.remove(agent_id, location)
 
     def add_statebuffer(self, agent_id: int, statebuffer: IStateBuffer) -> None:
         super(VacuumEnvironment, self).add_statebuffer(agent_id, statebuffer)
         statebuffer.update({"length": self._length, "agent_location": self._location_of(agent_id),
-                         "dirt_location": self._dirt_locations})
+                         "dirt_location": self._dirt_snapshot()})
 
     def remove_statebuffer(self, agent_id: int,statebuffer: IStateBuffer) -> None:
         super(VacuumEnvironment, self).remove_statebuffer(agent_id, statebuffer)
 
     def random_dirt(self, number_dirty_locations):
-        self._dirt_locations = self._dirt_locations.union(set(random.sample(range(self._length),
-                                                                            k=number_dirty_locations)))
+        with self._dirt_lock:
+            self._dirt_locations = self._dirt_locations.union(random.sample(range(self._length),
+                                                                            k=number_dirty_locations))
+
+    @property
+    def dirt_count(self) -> int:
+        return len(self._dirt_locations)
+
+    def _dirt_snapshot(self) -> DirtSet:
+        # The current version is immutable, so every buffer can share it as is
+        return self._dirt_locations
 
     def _is_dirty_in_location(self, x: int) -> bool:
         return x in self._dirt_locations
@@ -52,6 +106,7 @@ class VacuumEnvironment(SimulatedEnvironment):
             property_methods = {
                 "location": self._location_of,
                 "dirty": lambda agent_id: self._is_dirty_in_location(self._location_of(agent_id)),
+                "neighbourhood": self._neighbourhood,
             }
 
             property_method = property_methods.get(property_name)
@@ -65,25 +120,56 @@ class VacuumEnvironment(SimulatedEnvironment):
         else:
             return {}
 
-    def _handle_move(self, agent_id: int, direction: str) -> None:
+    def _neighbourhood(self, agent_id: int) -> dict:
+        """
+        Cells within view_radius in one call: dirt and other agents as offsets from the agent.
+        Reads only those cells, through the dirt bitset and the bucket index.
+        """
+        location = self._location_of(agent_id)
+        if location is None:
+            return None
+        start, stop = location - self._view_radius, location + self._view_radius + 1
+        dirt = self._dirt_locations.in_range(start, stop)
+        agents = []
+        for other_id in self._index.query(max(start, 0), min(stop, self._length)):
+            other = self._agents_locations.get(other_id)
+            if other_id != agent_id and other is not None and start <= other < stop:
+                agents.append(other - location)
+        return {"location": location, "length": self._length, "radius": self._view_radius,
+                "dirty": location in dirt,
+                "dirt": [x - location for x in dirt], "agents": sorted(agents)}
+
+    def _handle_move(self, agent_id: int, direction: str) -> bool:
+        if agent_id not in self._agents_locations:
+            return False
         if direction == "left":
             self._move_agent_left(agent_id)
         elif direction == "right":
             self._move_agent_right(agent_id)
         else:
             print(f"Invalid direction: {direction}")
+            return False
+        return True
 
     def _move_agent_left(self, agent_id: int):
-        self._agents_locations[agent_id] = max(self._agents_locations[agent_id] - 1, 0)
+        self._move_agent_to(agent_id, max(self._agents_locations[agent_id] - 1, 0))
 
     def _move_agent_right(self, agent_id: int):
-        self._agents_locations[agent_id] = min(self._agents_locations[agent_id] + 1, self._length - 1)
+        self._move_agent_to(agent_id, min(self._agents_locations[agent_id] + 1, self._length - 1))
+
+    def _move_agent_to(self, agent_id: int, location: int):
+        self._index.move(agent_id, self._agents_locations[agent_id], location)
+        self._agents_locations[agent_id] = location
 
-    def _make_clean(self, agent_id: int):
+    def _make_clean(self, agent_id: int) -> bool:
         location = self._location_of(agent_id)
-        self._dirt_locations.discard(location)
+        if location is None:
+            return False
+        with self._dirt_lock:
+            self._dirt_locations = self._dirt_locations.difference((location,))
+        return True
 
-    def take_action(self, agent_id: int, action_name: str, params: dict = {}) -> None:
+    def take_action(self, agent_id: int, action_name: str, params: dict = {}) -> bool:
         if agent_id in self._agents:
             action_methods = {
                 "move": (self._handle_move, ["direction"]),
@@ -93,13 +179,66 @@ class VacuumEnvironment(SimulatedEnvironment):
             action_method, expected_params = action_methods.get(action_name, (None, None))
             if action_method:
                 args = [agent_id] + [params.get(param) for param in expected_params]
-                action_method(*args)
-                self._update_statebuffers(agent_id)
+                with self.agent_lock(agent_id):
+                    applied = action_method(*args)
+                    if applied:
+                        self._update_statebuffers(agent_id)
+                if applied:
+                    self._notify(agent_id, {"type": "state_changed"})
+                return applied
             else:
                 print(f"Invalid action: {action_name}")
-
-    def _update_statebuffers(self, agent_id: int):
-        relevant_statebuffers = [entry["statebuffer"] for entry in self._statebuffers if entry["agent_id"] == agent_id]
+        return False
+
+    def step(self, actions: Mapping) -> dict:
+        """
+        Applies one action per agent as a single tick. Every action sees the state at the
+        start of the tick: cells are cleaned where the agents stood before anyone moved.
+        Statebuffers are updated once per agent with the same dirt snapshot.
+        :param actions: agent id -> (action_name, params), as in take_action
+        :return: agent id -> True if the action was applied
+        """
+        results = {}
+        cleaned, moves = [], {}
+        with ExitStack() as locks:
+            # Same per-agent locks as take_action, taken in id order so two ticks cannot deadlock
+            for agent_id in sorted(agent_id for agent_id in actions if agent_id in self._agents):
+                locks.enter_context(self.agent_lock(agent_id))
+            for agent_id, (action_name, params) in actions.items():
+                location = self._agents_locations.get(agent_id)
+                params = params or {}
+                if agent_id not in self._agents or location is None:
+                    results[agent_id] = False
+                elif action_name == "clean":
+                    cleaned.append(location)
+                    results[agent_id] = True
+                elif action_name == "move" and params.get("direction") in ("left", "right"):
+                    offset = 1 if params["direction"] == "right" else -1
+                    moves[agent_id] = min(max(location + offset, 0), self._length - 1)
+                    results[agent_id] = True
+                else:
+                    results[agent_id] = False
+
+            if cleaned:
+                with self._dirt_lock:
+                    self._dirt_locations = self._dirt_locations.difference(cleaned)
+            for agent_id, location in moves.items():
+                self._move_agent_to(agent_id, location)
+
+            dirt = self._dirt_snapshot()
+            acted = [agent_id for agent_id, applied in results.items() if applied]
+            for agent_id in acted:
+                self._update_statebuffers(agent_id, dirt)
+        for agent_id in acted:
+            self._notify(agent_id, {"type": "state_changed"})
+        return results
+
+    def _update_statebuffers(self, agent_id: int, dirt: DirtSet = None):
+        relevant_statebuffers = self.statebuffers_of(agent_id)
+        if not relevant_statebuffers:
+            return
+        if dirt is None:
+            dirt = self._dirt_snapshot()
         for statebuffer in relevant_statebuffers:
             statebuffer.update({"length": self._length, "agent_location": self._location_of(agent_id),
-                             "dirt_location": self._dirt_locations})
\ No newline at end of file
+                             "dirt_location": dirt})
\ No newline at end of file
@@ -0,0 +1,99 @@
+import base64
+import Pyro4
+from dirtset import DirtSet
+
+# Compact wire format for the Pyro adapters. Percept and action names become small
+# integer codes, states become positional tuples (dirt as base64 bits), and agent ids
+# (128-bit uuids) are split in two 64-bit halves, so every message fits msgpack,
+# marshal, json and serpent.
+
+SERIALIZERS = ("serpent", "marshal", "msgpack", "json")
+
+
+def configure(serializer: str) -> None:
+    """Select the serializer for proxies created by this process and accept it when serving"""
+    if serializer not in SERIALIZERS:
+        raise ValueError(f"Unsupported serializer: {serializer}")
+    Pyro4.config.SERIALIZER = serializer
+    Pyro4.config.SERIALIZERS_ACCEPTED.add(serializer)
+
+
+def pack_id(agent_id: int) -> tuple:
+    return agent_id >> 64, agent_id & 0xFFFFFFFFFFFFFFFF
+
+
+def unpack_id(packed) -> int:
+    high, low = packed
+    return (high << 64) | low
+
+
+# --- Schemas ---
+_schemas = {}
+
+
+def register_schema(name: str, pack, unpack) -> None:
+    _schemas[name] = (pack, unpack)
+
+
+def pack(name: str, value):
+    return None if value is None else _schemas[name][0](value)
+
+
+def unpack(name: str, value):
+    return None if value is None else _schemas[name][1](value)
+
+
+# Vacuum World
+VACUUM_PROPERTIES = ("location", "dirty", "neighbourhood")
+VACUUM_ACTIONS = (("move", "left"), ("move", "right"), ("clean", None))
+
+
+def pack_vacuum_action(action_name: str, params: dict) -> int:
+    return VACUUM_ACTIONS.index((action_name, params.get("direction")))
+
+
+def unpack_vacuum_action(code: int) -> tuple:
+    action_name, direction = VACUUM_ACTIONS[code]
+    return action_name, ({"direction": direction} if direction is not None else {})
+
+
+def _pack_dirt(state) -> str:
+    dirt = state["dirt_location"]
+    if not isinstance(dirt, DirtSet):
+        dirt = DirtSet(state["length"], dirt)
+    return base64.b64encode(dirt.to_bytes()).decode("ascii")
+
+
+register_schema("vacuum_state",
+                lambda state: (state["length"], state["agent_location"], _pack_dirt(state)),
+                lambda packed: {"length": packed[0], "agent_location": packed[1],
+                                "dirt_location": DirtSet.from_bytes(packed[0], base64.b64decode(packed[2]))})
+
+
+class PackedVacuumEnvironment:
+    """
+    Client view of VacuumWorldPyroAdapter that uses its packed methods. It offers the
+    environment API the vacuum sensors and actuators use, so agents work unchanged.
+    """
+    def __init__(self, proxy):
+        self._proxy = proxy
+
+    def add(self, agent_id: int) -> None:
+        self._proxy.add(agent_id)
+
+    def get_property(self, agent_id: int, property_name: str) -> dict:
+        code = VACUUM_PROPERTIES.index(property_name)
+        return {"agent": agent_id, property_name: self._proxy.get_property_packed(pack_id(agent_id), code)}
+
+    def take_action(self, agent_id: int, action_name: str, params: dict = {}) -> bool:
+        return self._proxy.take_action_packed(pack_id(agent_id), pack_vacuum_action(action_name, params))
+
+
+class PackedStateBuffer:
+    """Client view of a StateBufferPyroAdapter that unpacks the states of `schema`"""
+    def __init__(self, proxy, schema: str):
+        self._proxy = proxy
+        self._schema = schema
+
+    def get_state(self):
+        return unpack(self._schema, self._proxy.get_state_packed())